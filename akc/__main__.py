@@ -11,6 +11,9 @@ from collections import defaultdict
 from .net.compiler import compile
 from .utils import is_box, is_file_readable
 
+from akr.program import Program
+from akr.sinks import Sink
+
 import aksync.compiler
 
 __runtime_pkg__ = 'akr'
@@ -71,6 +74,7 @@ if __name__ == '__main__':
         graph.pprint()
 
     output = "#!/usr/bin/env python3\n\n"
+    output += "import sys\n"
     output += "import %s\n\n" % __runtime_pkg__
 
     if used_syncs:
@@ -83,8 +87,10 @@ if __name__ == '__main__':
         func_lines = inspect.getsourcelines(box.func)[0]
 
         if hasattr(box.func, 'ordered'):
-            decorator = "@%s.%s(%s)\n" % (__runtime_pkg__, box.func.cat,
-                                          box.func.ordered)
+            decorator = "@%s.%s(%s, associative=%s)\n" % (
+                __runtime_pkg__, box.func.cat, box.func.ordered,
+                box.func.associative
+            )
 
         else:
             decorator = "@%s.%s\n" % (__runtime_pkg__, box.func.cat)
@@ -97,10 +103,15 @@ if __name__ == '__main__':
         output += "".join(func_lines)
         output += "\n"
 
-    # Output handler.
-    handler = inspect.getsourcelines(decls.__output__)[0]
-    output += "@%s.output\n" % __runtime_pkg__
-    output += ''.join(handler)
+    # Output handler, either a function or one of the runtime sinks.
+    if isinstance(decls.__output__, Sink):
+        output += "__output__ = %s.%r\n" % (__runtime_pkg__, decls.__output__)
+
+    else:
+        handler = inspect.getsourcelines(decls.__output__)[0]
+        output += "@%s.output\n" % __runtime_pkg__
+        output += ''.join(handler)
+
     output += "\n"
 
     # Synchronisers
@@ -115,8 +126,8 @@ if __name__ == '__main__':
 
     # Add exit nodes.
     for bb, channels in exit_bbs.items():
-        # Create separate output vertex for each output as multi-input vertices
-        # are not currently supported
+        # Create separate output vertex for each output, a vertex with several
+        # inputs would join them
         for ch in channels:
             exit_node = '%s_exit_%s' % (bb, ch)
 
@@ -125,32 +136,35 @@ if __name__ == '__main__':
                            exit=True)
             graph.add_edge(bb, exit_node, {'chn': {ch}})
 
-    # Control flow graph.
-    output += "nodes = [\n"
-    for n in graph.nodes(data=True):
-        stmts = ', '.join('(%s, %s, %s)' % (f, ins, outs)
-                          for f, ins, outs in n[1]['stmts'])
+    # Control flow graph lowered to numbered basic blocks and channels.
+    program = Program.lower(graph)
 
-        output += "    ('%s', {'stmts': [%s]}),\n" % (n[0], stmts)
-    output += "]\n\n"
+    output += "blocks = [\n"
+    for bb_name, block in zip(graph.nodes(), program.blocks):
+        stmts = ''.join('(%s, %s, %s), ' % stmt for stmt in block)
 
-    output += "edges = [\n"
-    for n in graph.edges(data=True):
-        output += "    %s,\n" % str(n)
+        output += "    (%s),  # %s\n" % (stmts, bb_name)
     output += "]\n\n"
 
-    output += "cfg = %s.DiGraph()\n" % __runtime_pkg__
-    output += "cfg.add_nodes_from(nodes)\n"
-    output += "cfg.add_edges_from(edges)\n"
-    output += "cfg.entry = %s\n" % repr(graph.entry)
-    output += "cfg.exit = %s\n" % repr(graph.exit)
+    output += "routes = %s\n" % repr(list(program.routes))
+    output += "channels = %s\n" % repr(program.channels)
+    output += "entry = %s\n\n" % repr(program.entry)
+
+    output += "program = %s.Program(blocks, routes, channels, entry)\n" \
+        % __runtime_pkg__
     output += "\n"
 
     # Input.
     output += "__input__ = %s\n\n" % repr(decls.__input__)
 
+    # Large inputs are better streamed than embedded: channel=file arguments
+    # replace the input of a channel, `-' stands for the standard input.
+    output += "for arg in sys.argv[1:]:\n"
+    output += "    channel, path = arg.split('=', 1)\n"
+    output += "    __input__[channel] = sys.stdin if path == '-' else path\n\n"
+
     # Runners.
-    output += "runner = %s.Runner(cfg, __input__)\n" % __runtime_pkg__
+    output += "runner = %s.Runner(program, __input__)\n" % __runtime_pkg__
     output += "runner.run()\n"
 
     with open(options.output, 'w') as f:
@@ -28,14 +28,16 @@ ORDERED = True
 UNORDERED = False
 
 
-def reductor(adity, ordered, n_out):
+def reductor(adity, ordered, n_out, associative=False):
     assert adity == 1 or adity == 2
     assert ordered is True or ordered is False
+    assert associative is True or associative is False
 
     def setup(func):
         func.n_in = adity
         func.n_out = n_out
         func.ordered = ordered
+        func.associative = associative
         func.cat = 'reductor'
         def getf():
             return func
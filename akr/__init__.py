@@ -1,3 +1,19 @@
+from .program import *
 from .runtime import *
 from .boxes import *
 from .stream import *
+from .sinks import *
+from .profiling import *
+from .tracing import *
+from .checkpoint import *
+from .distributed import *
+
+
+def __getattr__(name):
+    # The graph is only built by compilers and tools, networkx is not loaded
+    # by workers running a program.
+    if name == 'DiGraph':
+        from .graph import DiGraph
+        return DiGraph
+
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+# Workers of a distributed run, see akr.distributed:
+#
+#   AKR_AUTHKEY=<hex key of the coordinator> python -m akr [-n N] HOST:PORT
+
+import os
+from multiprocessing import Process
+from optparse import OptionParser
+
+from .distributed import work
+
+usage = "usage: %prog [options] HOST:PORT"
+opts = OptionParser(usage=usage)
+
+opts.add_option('-n', '--nproc', type='int', dest='np', metavar='NPROC',
+                default=1, help='number of workers to start')
+
+if __name__ == '__main__':
+
+    (options, args) = opts.parse_args()
+
+    if len(args) != 1:
+        opts.error('Address of the coordinator is required')
+
+    if not os.environ.get('AKR_AUTHKEY'):
+        opts.error('Key of the coordinator is required in AKR_AUTHKEY')
+
+    host, port = args[0].rsplit(':', 1)
+    address = (host, int(port))
+    authkey = bytes.fromhex(os.environ['AKR_AUTHKEY'])
+
+    processes = [Process(target=work, args=(address, authkey))
+                 for i in range(options.np)]
+
+    for p in processes:
+        p.start()
+
+    for p in processes:
+        p.join()
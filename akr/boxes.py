@@ -1,35 +1,60 @@
+from functools import wraps
+from inspect import iscoroutinefunction
+
+
+# Boxes may be defined with `async def', the wrappers then return coroutines
+# and the net has to be run with the asyncio backend.
+#
+# Wrappers take the name of the box, so a program pickles its boxes by
+# reference.
+#
+# Boxes of vertices with several inputs are called with a message of each
+# input once they are joined, in the order of the inputs. The continuation of
+# such an inductor is the tuple of the arguments of its next step.
+
 def transductor(func):
-    def run(channel, msg):
-        return func(msg)
+    @wraps(func)
+    def run(channel, *msgs):
+        return func(*msgs)
     run.cat = 'transductor'
+    run.is_async = iscoroutinefunction(func)
     run.name = func.__name__
     return run
 
 
 def inductor(func):
-    def run(channel, msg):
-        return func(msg)
+    # The box returns its outputs and a continuation, None stops induction.
+    @wraps(func)
+    def run(channel, *msgs):
+        return func(*msgs)
     run.cat = 'inductor'
-    run.cont = None
+    run.is_async = iscoroutinefunction(func)
     run.name = func.__name__
     return run
 
 
-def reductor(ordered):
+def reductor(ordered, associative=False):
+    # Ordered reductors may be declared associative: contiguous ranges of a
+    # list are then folded in parallel and joined in order.
     def getf(func):
-        def run(channel, msg):
-            return func(msg)
+        # The box folds the next element into the accumulated value.
+        @wraps(func)
+        def run(channel, acc, msg):
+            return func(acc, msg)
         run.cat = 'reductor'
-        run.cont = None
+        run.is_async = iscoroutinefunction(func)
         run.ordered = ordered
+        run.associative = associative
         run.name = func.__name__
         return run
     return getf
 
 
 def output(func):
+    @wraps(func)
     def run(channel, msg):
         return func(channel, msg)
     run.cat = 'output'
+    run.is_async = False
     run.name = func.__name__
     return run
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+from queue import SimpleQueue
+
+__all__ = ['Store', 'latest']
+
+
+class Store:
+    # Checkpoints of a worker, kept in `path'/worker-<wid>: a manifest per
+    # epoch, <epoch>.json, names the pickles of the parts of the state by
+    # their hash. A part that has not changed since the previous checkpoint is
+    # not written again. This only spares the parts that stay put between
+    # epochs, such as joins or partials of long lists: the task queue and the
+    # input position change all the time and are written whole every epoch.
+    #
+    # The worker pickles its state while the net is paused, see
+    # Worker.checkpoint, a thread of the store hashes and writes it while the
+    # worker goes on. An epoch is complete once every worker has written its
+    # manifest, older ones are then removed.
+
+    def __init__(self, path, wid, n_workers):
+        self.path = path
+        self.wid = wid
+        self.n_workers = n_workers
+
+        self.dir = os.path.join(path, 'worker-%d' % wid)
+        self.queue = None
+        self.writer = None
+
+    def start(self):
+        os.makedirs(self.dir, exist_ok=True)
+
+        self.queue = SimpleQueue()
+        self.writer = threading.Thread(target=self.write_all, daemon=True)
+        self.writer.start()
+
+    def stop(self):
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+
+    def save(self, epoch, state):
+        # Parts of the state by name. They are pickled right away: boxes
+        # change accumulators in place once the worker goes on.
+        self.queue.put((epoch, {
+            name: pickle.dumps(part, pickle.HIGHEST_PROTOCOL)
+            for name, part in state.items()}))
+
+    def write_all(self):
+        for epoch, state in iter(self.queue.get, None):
+            self.write(epoch, state)
+
+    def write(self, epoch, state):
+        manifest = {'epoch': epoch, 'n_workers': self.n_workers, 'parts': {}}
+
+        for name, data in state.items():
+            digest = hashlib.sha1(data).hexdigest()
+            blob = os.path.join(self.dir, digest)
+
+            if not os.path.exists(blob):
+                _write(blob, data)
+
+            manifest['parts'][name] = digest
+
+        _write(os.path.join(self.dir, '%d.json' % epoch),
+               json.dumps(manifest).encode())
+
+        if epoch in _complete(self.path, self.n_workers):
+            self.prune(epoch)
+
+    def prune(self, epoch):
+        # Keep the manifests from `epoch' on and the pickles they name.
+        keep = set()
+
+        for name in os.listdir(self.dir):
+            if not name.endswith('.json'):
+                continue
+
+            path = os.path.join(self.dir, name)
+
+            if int(name[:-5]) < epoch:
+                os.remove(path)
+            else:
+                keep.update(_manifest(path)['parts'].values())
+
+        for name in os.listdir(self.dir):
+            if '.' not in name and name not in keep:
+                os.remove(os.path.join(self.dir, name))
+
+
+def latest(path):
+    # The latest complete checkpoint under `path' as (epoch, states), a dict
+    # of parts per worker, None if there is none.
+    if not os.path.isdir(path):
+        return None
+
+    dirs = [d for d in os.listdir(path) if d.startswith('worker-')]
+
+    if not dirs:
+        return None
+
+    n_workers = len(dirs)
+    epochs = _complete(path, n_workers)
+
+    if not epochs:
+        return None
+
+    epoch = max(epochs)
+    states = []
+
+    for wid in range(n_workers):
+        wdir = os.path.join(path, 'worker-%d' % wid)
+        manifest = _manifest(os.path.join(wdir, '%d.json' % epoch))
+
+        state = {}
+
+        for name, digest in manifest['parts'].items():
+            with open(os.path.join(wdir, digest), 'rb') as f:
+                state[name] = pickle.load(f)
+
+        states.append(state)
+
+    return epoch, states
+
+
+def discard(path, after=None):
+    # Remove the checkpoints of epochs after `after', all of them if None.
+    # Manifests left over from a failed run would otherwise be taken for
+    # parts of the epochs of the next one.
+    if not os.path.isdir(path):
+        return
+
+    for d in os.listdir(path):
+        if not d.startswith('worker-'):
+            continue
+
+        wdir = os.path.join(path, d)
+
+        if after is None:
+            shutil.rmtree(wdir)
+            continue
+
+        for name in os.listdir(wdir):
+            if name.endswith('.json') and int(name[:-5]) > after:
+                os.remove(os.path.join(wdir, name))
+
+
+def _complete(path, n_workers):
+    # Epochs with the manifests of all workers.
+    epochs = None
+
+    for wid in range(n_workers):
+        try:
+            names = os.listdir(os.path.join(path, 'worker-%d' % wid))
+        except FileNotFoundError:
+            return set()
+
+        found = {int(n[:-5]) for n in names if n.endswith('.json')}
+        epochs = found if epochs is None else epochs & found
+
+    return epochs
+
+
+def _manifest(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write(path, data):
+    # A file appears whole or not at all.
+    tmp = path + '.tmp'
+
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp, path)
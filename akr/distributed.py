@@ -0,0 +1,382 @@
+import os
+import socket
+import threading
+import traceback
+from multiprocessing import AuthenticationError, Process
+from queue import SimpleQueue
+
+from .program import Program
+from .profiling import Profile
+from .runtime import Worker, read
+from .sinks import Sink
+from .tracing import Trace
+from .transport import TcpTransport, send_frame, recv_frame, authenticate
+
+__all__ = ['Coordinator', 'work']
+
+
+class Coordinator:
+    # Runs a net on workers connected over TCP, possibly from other hosts:
+    #
+    #   coordinator = Coordinator(cfg, __input__, 4, ('0.0.0.0', 9000),
+    #                             authkey=key)
+    #   coordinator.run()
+    #
+    # with `python -m akr HOST:9000' started for each worker, given the key
+    # in AKR_AUTHKEY as hex, or coordinator.run(local=True) to start them as
+    # processes of this host. Workers unpickle the program, so its boxes must
+    # be importable there.
+    #
+    # Every connection, to the coordinator and between workers, is
+    # authenticated with the key before anything is unpickled, see
+    # transport.authenticate; connections that fail are dropped. Without a
+    # key a random one is made, `authkey', which remote workers then need.
+    #
+    # Once all workers have connected, each of them gets the program, the
+    # addresses of the others and, the first one, the input. Workers connect
+    # to each other: messages, partial results and stolen tasks go straight
+    # from worker to worker, the coordinator only detects termination.
+    #
+    # A worker reports its counters of work-carrying messages whenever it goes
+    # idle. Once the reports of all workers are idle and the counters add up,
+    # the coordinator probes the workers in waves: the net is done when two
+    # waves in a row find all workers idle with the same counters.
+
+    def __init__(self, cfg, __input__, n_workers=2, address=('127.0.0.1', 0),
+                 scheduler='stealing', batch_size=64, flush_interval=0.001,
+                 placement='locality', capacity=None, profile=None,
+                 trace=None, authkey=None):
+
+        program = cfg if isinstance(cfg, Program) else Program.lower(cfg)
+        program.check()
+
+        if any(f.is_async for f in program.boxes()):
+            raise ValueError('Async boxes require the asyncio backend')
+
+        if any(isinstance(f, Sink) for f in program.outputs()):
+            raise ValueError('Sinks are not supported by distributed runs')
+
+        self.program = program
+        self.input = __input__
+        self.n_workers = n_workers
+
+        self.options = {
+            'scheduler': scheduler,
+            'batch_size': batch_size,
+            'flush_interval': flush_interval,
+            'placement': placement,
+            'capacity': capacity,
+            'profile': bool(profile),
+            'trace': bool(trace),
+        }
+
+        self.authkey = os.urandom(32) if authkey is None else authkey
+        self.listener = socket.create_server(address, backlog=n_workers)
+        self.address = self.listener.getsockname()
+
+        self.profile = Profile() if profile else None
+        self.profile_path = profile if isinstance(profile, str) else None
+        self.traces = [] if trace else None
+        self.trace_path = trace if isinstance(trace, str) else None
+
+        # Traffic per link, see TcpEndpoint.links.
+        self.links = None
+
+    def run(self, local=False):
+        processes = []
+
+        if local:
+            processes = [Process(target=work,
+                                 args=(self.address, self.authkey))
+                         for i in range(self.n_workers)]
+
+            for p in processes:
+                p.start()
+
+        try:
+            self.serve()
+
+        finally:
+            self.listener.close()
+
+            for p in processes:
+                p.join()
+
+    def serve(self):
+        n = self.n_workers
+
+        workers = []
+        addresses = []
+
+        while len(workers) < n:
+            sock = accept(self.listener, self.authkey)
+            hello = recv_frame(sock)[0]
+
+            workers.append(sock)
+            addresses.append(hello[1])
+
+        for wid, sock in enumerate(workers):
+            send_frame(sock, ('setup', wid, addresses, self.program,
+                              self.options, self.input if wid == 0 else None))
+
+        inbox = SimpleQueue()
+
+        for wid, sock in enumerate(workers):
+            threading.Thread(target=self.read, args=(wid, sock, inbox),
+                             daemon=True).start()
+
+        try:
+            reported = self.detect(workers, inbox)
+
+        finally:
+            for sock in workers:
+                sock.close()
+
+        if self.profile is not None:
+            for profile, trace in reported:
+                self.profile.merge(profile)
+
+            if self.profile_path is not None:
+                self.profile.dump(self.profile_path)
+
+        if self.traces is not None:
+            self.traces = [trace for profile, trace in reported]
+
+            if self.trace_path is not None:
+                Trace.dump(self.trace_path, self.traces)
+
+    @staticmethod
+    def read(wid, sock, inbox):
+        while True:
+            r = recv_frame(sock)
+            inbox.put((wid, None if r is None else r[0]))
+
+            if r is None:
+                return
+
+    def detect(self, workers, inbox):
+        # Termination detection, returns the profiles and traces of the
+        # workers.
+        n = self.n_workers
+
+        # Counters per worker: (idle, sent, recv).
+        reports = [None] * n
+        answers = {}
+        previous = None
+        wave = 0
+        probing = stopping = False
+
+        reported = [None] * n
+        links = [None] * n
+
+        def broadcast(data):
+            for sock in workers:
+                try:
+                    send_frame(sock, data)
+                except OSError:
+                    # A failed worker may be gone.
+                    pass
+
+        def settled(states):
+            return all(idle for idle, sent, recv in states) and \
+                sum(sent for idle, sent, recv in states) == \
+                sum(recv for idle, sent, recv in states)
+
+        while not all(links):
+            wid, r = inbox.get()
+
+            if r is None:
+                if links[wid] is not None:
+                    # Closed after it was done.
+                    continue
+
+                raise RuntimeError('Worker %d has disconnected' % wid)
+
+            if r[0] == 'idle':
+                reports[wid] = r[1:]
+
+            elif r[0] == 'answer':
+                if r[1] != wave:
+                    continue
+
+                answers[wid] = reports[wid] = r[2:]
+
+                if len(answers) < n:
+                    continue
+
+                probing = False
+
+                if not settled(answers.values()):
+                    previous = None
+
+                elif answers == previous:
+                    stopping = True
+                    broadcast(('stop', ))
+
+                else:
+                    previous = dict(answers)
+
+            elif r[0] == 'report':
+                reported[wid] = r[1:]
+
+            elif r[0] == 'done':
+                links[wid] = r[1]
+
+            elif r[0] == 'error':
+                broadcast(('stop', ))
+
+                raise RuntimeError('Worker %d has failed:\n%s' % (wid, r[1]))
+
+            if not probing and not stopping and all(reports) and \
+                    settled(reports):
+                wave += 1
+                answers = {}
+                probing = True
+                broadcast(('probe', wave))
+
+        self.links = {}
+
+        for src, link in enumerate(links):
+            for dst, (frames, messages, size) in link['sent'].items():
+                self.links[src, dst] = {
+                    'frames': frames,
+                    'messages': messages,
+                    'bytes': size,
+                    'seconds': link['seconds'],
+                }
+
+        return reported
+
+    def throughput(self):
+        # Messages and bytes per second on each link over the run of its
+        # sender.
+        return {link: (r['messages'] / r['seconds'], r['bytes'] / r['seconds'])
+                for link, r in sorted(self.links.items())}
+
+
+class RemoteTermination:
+    # Counters of a worker for the termination detection of the coordinator,
+    # see Coordinator. Only the slots of the worker are used.
+
+    def __init__(self, wid, n_workers, control):
+        self.wid = wid
+        self.control = control
+
+        self.sent = [0] * n_workers
+        self.recv = [0] * n_workers
+        self.idle = [0] * n_workers
+
+        self.reported = None
+
+    def state(self):
+        return (self.idle[self.wid], self.sent[self.wid], self.recv[self.wid])
+
+    def detect(self):
+        # The worker is idle with an empty mailbox, tell the coordinator what
+        # has changed since. It sends the stop.
+        state = self.state()
+
+        if state[0] and state != self.reported:
+            send_frame(self.control, ('idle', ) + state)
+            self.reported = state
+
+        return False
+
+    def answer(self, wave):
+        send_frame(self.control, ('answer', wave) + self.state())
+
+
+class Reports:
+    # Profile and trace of a worker, see Worker.start.
+
+    def __init__(self, control):
+        self.control = control
+
+    def put(self, report):
+        send_frame(self.control, ('report', ) + report)
+
+
+def accept(listener, authkey):
+    # The next connection that authenticates.
+    while True:
+        sock, address = listener.accept()
+
+        try:
+            authenticate(sock, authkey, True)
+        except AuthenticationError:
+            sock.close()
+            continue
+
+        return sock
+
+
+def work(address, authkey):
+    # Runs a worker for the coordinator at `address'.
+    control = socket.create_connection(address)
+    authenticate(control, authkey, False)
+
+    # Peers connect on the interface that reaches the coordinator.
+    listener = socket.create_server((control.getsockname()[0], 0))
+    send_frame(control, ('hello', listener.getsockname()))
+
+    setup, wid, addresses, program, options, __input__ = \
+        recv_frame(control)[0]
+
+    # Connect to the workers before this one, accept the ones after it.
+    n_workers = len(addresses)
+    peers = [None] * n_workers
+
+    for j in range(wid):
+        peers[j] = socket.create_connection(addresses[j])
+        authenticate(peers[j], authkey, False)
+        send_frame(peers[j], ('peer', wid))
+
+    # Only the workers after this one connect to it, each once.
+    while not all(peers[wid + 1:]):
+        sock = accept(listener, authkey)
+        peer = recv_frame(sock)[0][1]
+
+        if not wid < peer < n_workers or peers[peer] is not None:
+            raise RuntimeError('Unexpected connection of worker %d' % peer)
+
+        peers[peer] = sock
+
+    listener.close()
+
+    for sock in peers:
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    transport = TcpTransport(wid, peers)
+    endpoint = transport.endpoint(wid)
+
+    def listen():
+        # Messages of the coordinator go to the mailbox of the worker.
+        while True:
+            r = recv_frame(control)
+
+            if r is None:
+                return
+
+            endpoint.inbox.put(r[0])
+
+    threading.Thread(target=listen, daemon=True).start()
+
+    source = None if __input__ is None else read(program, __input__)
+
+    worker = Worker(wid, program, (), transport, source=source,
+                    reports=Reports(control), **options)
+
+    try:
+        worker.start(RemoteTermination(wid, n_workers, control),
+                     [0] * n_workers)
+
+    except BaseException:
+        send_frame(control, ('error', traceback.format_exc()))
+        raise
+
+    else:
+        send_frame(control, ('done', endpoint.links()))
+
+    finally:
+        control.close()
@@ -0,0 +1,13 @@
+from .program import Program
+
+import networkx as nx
+
+__all__ = ['DiGraph']
+
+
+class DiGraph(nx.DiGraph):
+    # Control flow graph as emitted by the compiler, workers run it lowered
+    # to a Program.
+
+    def lower(self):
+        return Program.lower(self)
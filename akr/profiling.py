@@ -0,0 +1,52 @@
+import json
+
+__all__ = ['Profile']
+
+# Counters of a vertex.
+CALLS, TIME, MAX, IN, OUT, SUSPENDED = range(6)
+FIELDS = ('calls', 'time_ns', 'max_ns', 'in', 'out', 'suspended_ns')
+
+
+def timed(counters, elapsed):
+    # A call of the box of a vertex, timed by the worker.
+    counters[CALLS] += 1
+    counters[TIME] += elapsed
+
+    if elapsed > counters[MAX]:
+        counters[MAX] = elapsed
+
+
+class Profile:
+    # Counters per vertex, keyed by the name of its box:
+    #   calls, cumulative and max wall time of the box, messages in and out,
+    #   time messages of a reductor have spent suspended.
+    #
+    # Workers time the calls of boxes and count messages. Profiles of
+    # workers are merged into a report.
+
+    def __init__(self):
+        self.vertices = {}
+
+    def vertex(self, name):
+        counters = self.vertices.get(name)
+
+        if counters is None:
+            counters = self.vertices[name] = [0] * len(FIELDS)
+
+        return counters
+
+    def merge(self, other):
+        for name, counters in other.vertices.items():
+            mine = self.vertex(name)
+
+            for i, value in enumerate(counters):
+                mine[i] = max(mine[i], value) if i == MAX else mine[i] + value
+
+    def report(self):
+        return {name: dict(zip(FIELDS, counters))
+                for name, counters in sorted(self.vertices.items())}
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write('\n')
@@ -0,0 +1,105 @@
+__all__ = ['Program']
+
+
+class Program:
+    # The control flow graph lowered for execution by workers. Basic blocks
+    # and channels are numbered, so the program is made of tuples, dicts and
+    # ints only:
+    #   blocks[bb] = ((func, input channels, output channels), ...)
+    #   routes[bb] = {channel: next bb}
+    #   channels[channel] = channel name
+    #   entry = {channel name: bb}
+    # The pc of a message is a pair (bb, index of the statement).
+
+    def __init__(self, blocks, routes, channels, entry):
+        self.blocks = tuple(map(tuple, blocks))
+        self.routes = tuple(routes)
+        self.channels = tuple(channels)
+        self.entry = entry
+
+        self.channel_ids = {name: i for i, name in enumerate(self.channels)}
+
+    @classmethod
+    def lower(cls, cfg):
+        # Number basic blocks in the order of the graph and channels in the
+        # order they are met.
+        bb_ids = {bb_name: i for i, bb_name in enumerate(cfg.nodes())}
+        channel_ids = {}
+
+        def number(channels):
+            return tuple(channel_ids.setdefault(c, len(channel_ids))
+                         for c in channels)
+
+        blocks = [None] * len(bb_ids)
+
+        for bb_name, attrs in cfg.nodes(data=True):
+            blocks[bb_ids[bb_name]] = tuple((func, number(inputs),
+                                             number(outputs))
+                                            for func, inputs, outputs
+                                            in attrs['stmts'])
+
+        routes = [{} for bb in blocks]
+
+        for bb_name, next_bb, attrs in cfg.edges(data=True):
+            for c in number(sorted(attrs['chn'])):
+                routes[bb_ids[bb_name]].setdefault(c, bb_ids[next_bb])
+
+        number(sorted(cfg.entry))
+
+        channels = sorted(channel_ids, key=channel_ids.get)
+        entry = {name: bb_ids[bb_name] for name, bb_name in cfg.entry.items()}
+
+        return cls(blocks, routes, channels, entry)
+
+    def __getstate__(self):
+        return (self.blocks, self.routes, self.channels, self.entry)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def stmt(self, pc):
+        bb, index = pc
+        return self.blocks[bb][index]
+
+    def next_pc(self, old_pc, channel):
+        bb, index = old_pc
+        next_index = index + 1
+
+        if next_index < len(self.blocks[bb]):
+            # Next vertex on the same basic block.
+            return (bb, next_index)
+
+        # Go to the next basic block according to the channel.
+        try:
+            return (self.routes[bb][channel], 0)
+
+        except KeyError as ke:
+            raise AssertionError(
+                'Cannot find appropriate basic block'
+            ) from ke
+
+    def boxes(self):
+        for block in self.blocks:
+            for func, inputs, outputs in block:
+                if func.cat != 'output':
+                    yield func
+
+    def check(self):
+        # Only transductors and inductors join the messages of several
+        # inputs, see Worker.join.
+        for block in self.blocks:
+            for func, inputs, outputs in block:
+                if len(inputs) > 1 and \
+                        func.cat not in ('transductor', 'inductor'):
+                    raise ValueError('Inputs of %s %s cannot be joined'
+                                     % (func.cat, func.name))
+
+    def outputs(self):
+        # Output boxes, each once.
+        seen = set()
+
+        for block in self.blocks:
+            for func, inputs, outputs in block:
+                if func.cat == 'output' and id(func) not in seen:
+                    seen.add(id(func))
+                    yield func
@@ -1,90 +1,663 @@
+import time
+import asyncio
 from collections import deque
-from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 
-from multiprocessing import Process, Queue, Manager, Lock
+from multiprocessing import Process, Array, Queue
 from queue import Empty as Empty
-from .stream import Stream, Message
-from . import utils
+from itertools import islice
+from .stream import Stream, Message, Messages, items
+from .scheduler import Termination, Backlog, Checkpoints, steal_half, home
+from .transport import transports, LocalTransport
+from .program import Program
+from .sinks import Sink
+from .profiling import Profile, timed, CALLS, TIME, MAX, IN, OUT, SUSPENDED
+from .tracing import Trace, MESSAGE, SENT, SENT_PARTIAL, SENT_STOLEN, ID, \
+    STOLEN, EPOCH
+from .checkpoint import Store, latest, discard
+
+__all__ = ['Worker', 'SequentialWorker', 'AsyncWorker', 'Runner']
+
+
+class Partial:
+    # Elements of a list folded by a worker.
+    #
+    # Ordered reductions keep contiguous index ranges and only join adjacent
+    # ones:
+    #   start -> (end, result)
+    # Unordered reductions fold everything into a single range [0, count).
+    # The list is
+    # complete once the number of folded elements reaches its length, which
+    # is known from `last' = (length, bracket, id of the result).
+
+    def __init__(self, pc, ordered):
+        self.pc = pc
+        self.ordered = ordered
+        self.count = 0
+        self.last = None
+
+        self.starts = {}
+        self.ends = {}
 
-import networkx as nx
-
-__all__ = ['DiGraph', 'Worker', 'Runner']
+    @property
+    def complete(self):
+        return self.last is not None and self.count == self.last[0]
 
+    @property
+    def result(self):
+        assert len(self.starts) == 1
+        return next(iter(self.starts.values()))[1]
 
-class DiGraph(nx.DiGraph):
+    def add(self, func, start, end, acc):
+        self.count += end - start
 
-    def next_pc(self, old_pc, channel):
-        bb_name, index = old_pc
-        bb_stmts = self.node[bb_name]['stmts']
+        if not self.ordered:
+            if self.starts:
+                _, (_, partial) = self.starts.popitem()
+                acc = func(None, partial, acc)
 
-        assert index < len(bb_stmts)
+            self.starts[0] = (self.count, acc)
+            return
 
-        next_index = (index + 1) % len(bb_stmts)
+        if start in self.ends:
+            # Join the range on the left.
+            start = self.ends.pop(start)
+            _, partial = self.starts.pop(start)
+            acc = func(None, partial, acc)
 
-        if next_index:
-            # Next vertex on the same basic block.
-            return (bb_name, next_index)
+        if end in self.starts:
+            # Join the range on the right.
+            end, partial = self.starts.pop(end)
+            del self.ends[end]
+            acc = func(None, acc, partial)
 
-        else:
-            # Go to the next basic block according to the channel.
-            try:
-                _, next_bb, _ = next(filter(lambda x: channel in x[2]['chn'],
-                                            self.out_edges((bb_name, ),
-                                                           data=True)))
+        self.starts[start] = (end, acc)
+        self.ends[end] = start
 
-            except StopIteration as si:
-                raise AssertionError(
-                    'Cannot find appropriate basic block'
-                ) from si
+    def merge(self, func, other):
+        for start, (end, acc) in other.starts.items():
+            self.add(func, start, end, acc)
 
-            return (next_bb, next_index)
+        self.last = self.last or other.last
 
 
 class Worker:
 
-    def __init__(self, wid, cfg, tasks, queues):
+    def __init__(self, wid, program, tasks, transport, scheduler='stealing',
+                 poll_interval=0.001, batch_size=64, flush_interval=0.001,
+                 poll_every=16, placement='locality', capacity=None,
+                 window=None, backlog=None, source=None, profile=False,
+                 trace=False, reports=None, store=None, barrier=None,
+                 checkpoint_interval=1.0):
 
         self.wid = wid
         self.nonce = 0
-        self.cfg = cfg
-        self.queues = queues
-        self.n_workers = len(queues)
+        self.program = program
+        self.mailbox = transport.endpoint(wid)
+        self.n_workers = transport.n_workers
 
         self.tasks = deque(tasks)
         self.tasks_suspended = {}
 
+        # Reductor sessions of the lists owned by the worker:
+        #   list_id -> (index of the next element, continuation)
+        self.sessions = {}
+
+        # Partial results of unordered and associative reductions:
+        #   list_id -> Partial
+        # Partials of lists owned by other workers are forwarded on flush.
+        self.partials = {}
+        self.forward = set()
+
+        # Messages waiting for the other inputs of a vertex, per vertex and
+        # indices of their ids:
+        #   (pc, indices) -> (queue of messages per input, ...)
+        self.joins = {}
+
+        # Scheduling.
+        assert scheduler in ('stealing', 'partition')
+        self.stealing = scheduler == 'stealing'
+        self.poll_interval = poll_interval
+        self.poll_every = poll_every
+        self.skip = 0
+        self.victim = wid
+        self.steal_pending = False
+
+        # Elements of a list produced by an inductor are either sent to the
+        # home worker of the list or scattered over workers.
+        assert placement in ('locality', 'scatter')
+        self.locality = placement == 'locality'
+        self.turn = 0
+
+        # Input messages not yet injected into the net, read by a single
+        # worker while the net runs.
+        self.source = source
+        self.next_input = None
+        self.position = 0
+
+        # Backpressure. An inductor step is parked instead of rescheduled
+        # while a worker its elements go to has `capacity' tasks queued or
+        # `window' messages on the way to it.
+        assert capacity is None or capacity >= 1
+        assert window is None or window >= 1
+        self.capacity = capacity
+        self.window = window
+        self.backlog = backlog
+        self.bounded = capacity is not None or window is not None
+        self.parked = deque()
+
+        # Outbound batches per destination worker.
+        assert batch_size >= 1
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.outbox = [[] for i in range(self.n_workers)]
+        self.n_buffered = 0
+        self.buffered_at = None
+
+        self.term = None
+
+        # Output boxes buffering records, flushed before the worker idles.
+        self.sinks = [f for f in program.outputs() if isinstance(f, Sink)]
+
+        # Counters per vertex, boxes are called through `timed_call'. The
+        # profile and the trace are put into `reports' when the worker is
+        # done.
+        self.profile = None
+        self.reports = reports
+        self.suspended_at = {}
+
+        if profile:
+            self.profile = Profile()
+            self.counters = {(bb, index): self.profile.vertex(stmt[0].name)
+                             for bb, block in enumerate(program.blocks)
+                             for index, stmt in enumerate(block)}
+            self.folders = {}
+            self.call = self.timed_call
+
+        # Events of the worker on a timeline, tasks are executed through
+        # `traced'.
+        self.trace = None
+
+        if trace:
+            self.trace = Trace(wid, program.channels)
+            self.execute = self.traced
+
+        # Messages and tasks sent to other workers, per sender.
+        self.moved = None
+
+        # Checkpoints of the state of the worker are saved to `store' every
+        # `checkpoint_interval' seconds, with the peers paused at `barrier'.
+        self.store = store
+        self.barrier = barrier
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpointed_at = time.perf_counter()
+        self.epoch = 0
+
     @property
     def is_ready(self):
         return bool(self.tasks)
 
     def event_loop(self):
 
+        if self.skip and self.tasks:
+            # A busy worker looks into the mailbox every `poll_every' tasks.
+            self.skip -= 1
+            return True
+
+        self.skip = self.poll_every
+        idle_from = None
+
+        if self.barrier is not None and self.due() and not self.checkpoint():
+            return False
+
+        if self.backlog is not None:
+            self.backlog.queued[self.wid] = len(self.tasks)
+
+        if self.parked:
+            self.unpark()
+
+        if self.source is not None and len(self.tasks) < self.batch_size:
+            self.inject()
+
+        if (self.n_buffered or self.forward) and \
+                time.perf_counter() - self.buffered_at >= self.flush_interval:
+            self.flush()
+
+        for sink in self.sinks:
+            sink.expire()
+
         while True:
+            is_blocked = not self.is_ready
+
+            if is_blocked:
+                # Nothing may stay buffered while the worker is idle.
+                if self.n_buffered or self.forward:
+                    self.flush()
+
+                for sink in self.sinks:
+                    sink.flush()
+
+                if not self.parked and self.source is None:
+                    self.term.idle[self.wid] = 1
+
+                if self.trace is not None and idle_from is None:
+                    idle_from = time.perf_counter_ns()
+
             try:
-                is_blocked = not self.is_ready
-                r = self.queues[self.wid].get(is_blocked)
+                r = self.mailbox.get(is_blocked, self.poll_interval)
             except Empty:
-                break
+                if not is_blocked:
+                    break
 
-            if r[0] == 'msg':
-                m = Message(*r[1:4])
+                if self.barrier is not None and self.due():
+                    if not self.checkpoint():
+                        self.woke(idle_from)
+                        return False
 
-                channel, pc = r[4:]
-                m.set_loc(channel, pc)
+                    continue
 
-                self.tasks.append(m)
+                if self.parked or self.source is not None:
+                    # Wait for the peers to catch up.
+                    self.unpark()
+
+                    if self.source is not None:
+                        self.inject()
+
+                    continue
 
-            elif r[0] == 'wakeup':
-                self.tasks.append(self.tasks_suspended[r[1]])
+                if self.term.detect():
+                    self.woke(idle_from)
+                    self.stop()
+                    return False
+
+                if self.stealing and not self.steal_pending:
+                    self.steal()
+
+                continue
+
+            if not self.take(r):
+                self.woke(idle_from)
+                return False
 
             # print('New req at worker %d: %s' % (self.wid, r))
 
+        self.woke(idle_from)
         return True
 
+    def take(self, r):
+        # Handle a message from the mailbox, False on stop.
+        if r[0] not in ('steal', 'nosteal', 'stop', 'probe'):
+            # Work-carrying message, see Termination.
+            self.term.idle[self.wid] = 0
+            self.term.recv[self.wid] += 1
+
+        if r[0] == 'batch':
+            self.receive_all(r[1])
+
+            for item in r[2]:
+                self.receive(item)
+
+            return True
+
+        return self.receive(r)
+
+    def woke(self, idle_from):
+        # Close the idle gap of the trace, if any.
+        if idle_from is not None:
+            self.trace.span('idle', 'idle', idle_from)
+
+    def receive(self, r):
+
+        if self.trace is not None:
+            self.traced_receive(r)
+
+        if r[0] == 'msg':
+            self.tasks.append(self.load(r))
+
+            if self.backlog is not None:
+                self.backlog.arrived[self.wid] += 1
+
+        elif r[0] == 'partial':
+            self.combine(r[1], r[2])
+
+        elif r[0] == 'tasks':
+            self.steal_pending = False
+            self.tasks.extend(r[1])
+
+        elif r[0] == 'nosteal':
+            self.steal_pending = False
+
+        elif r[0] == 'steal':
+            stolen = steal_half(self.tasks)
+
+            if stolen:
+                self.moved[self.wid] += len(stolen)
+                stolen = Messages(t.dump() for t in stolen)
+
+                if self.trace is not None:
+                    self.traced_send(r[1], ('tasks', stolen))
+
+                self.post(r[1], ('tasks', stolen))
+            else:
+                self.mailbox.put(r[1], ('nosteal', ))
+
+        elif r[0] == 'probe':
+            # Termination wave of a coordinator, see distributed.
+            self.term.answer(r[1])
+
+        elif r[0] == 'stop':
+            return False
+
+        return True
+
+    def receive_all(self, msgs):
+        # Messages of a batch, see flush.
+        if self.trace is not None:
+            for m in msgs:
+                self.traced_receive(m.dump())
+
+        self.tasks.extend(msgs)
+
+        if self.backlog is not None:
+            self.backlog.arrived[self.wid] += len(msgs)
+
+    @staticmethod
+    def load(r):
+        m = Message(*r[1:4])
+
+        channel, pc = r[4:]
+        m.set_loc(channel, pc)
+
+        return m
+
+    def owner(self, list_id):
+        return home(list_id, self.n_workers)
+
+    def place(self, task):
+        # Worker of an input message. Lists consumed by a reductor are kept
+        # whole on their home worker. Any other message is placed where the
+        # lists it produces will live: the home of a list nested in a message
+        # is found from the id of the message.
+        if not self.locality:
+            wid = self.turn
+            self.turn = (self.turn + 1) % self.n_workers
+            return wid
+
+        if self.stmt(task.pc)[0].cat == 'reductor':
+            return self.owner(task.id[:-1])
+
+        return self.owner(task.id)
+
+    def inject(self):
+        # Take up to a batch of input messages.
+        for i in range(self.batch_size):
+
+            if self.next_input is None:
+                self.next_input = next(self.source, None)
+
+                if self.next_input is None:
+                    self.source = None
+                    return
+
+            wid = self.place(self.next_input)
+
+            if self.bounded and self.congested((wid, )):
+                return
+
+            task, self.next_input = self.next_input, None
+            self.position += 1
+
+            if wid == self.wid:
+                self.tasks.append(task)
+            else:
+                self.send(wid, task.dump())
+
+    def parent(self, list_id):
+        # Workers form a binary tree rooted at the owner of the list.
+        root = self.owner(list_id)
+        rank = (self.wid - root) % self.n_workers
+        return ((rank - 1) // 2 + root) % self.n_workers
+
+    def stmt(self, pc):
+        bb, index = pc
+        return self.program.blocks[bb][index]
+
+    def reduced(self, pc, acc, mid, bracket):
+        # For simplicity temporarily assume a single output port
+        channel = self.stmt(pc)[2][0]
+
+        m = Message(acc, mid)
+        m.sm_dec(bracket)
+
+        if self.profile is not None:
+            self.counters[pc][OUT] += 1
+
+        next_pc = self.program.next_pc(pc, channel)
+        m.set_loc(channel, next_pc)
+
+        self.tasks.append(m)
+
+    def combine(self, list_id, partial):
+
+        if list_id in self.partials:
+            func = self.stmt(partial.pc)[0]
+
+            if self.profile is not None:
+                func = self.timed_folder(partial.pc, func)
+
+            self.partials[list_id].merge(func, partial)
+
+        else:
+            self.partials[list_id] = partial
+
+        self.settle(list_id)
+
+    def settle(self, list_id):
+        partial = self.partials[list_id]
+
+        if self.owner(list_id) != self.wid:
+            if not self.n_buffered and not self.forward:
+                self.buffered_at = time.perf_counter()
+
+            self.forward.add(list_id)
+
+        elif partial.complete:
+            # All elements are folded.
+            del self.partials[list_id]
+
+            length, bracket, mid = partial.last
+            self.reduced(partial.pc, partial.result, mid, bracket)
+
     def send(self, wid, data):
-        self.queues[wid].put(data)
+        if not self.n_buffered and not self.forward:
+            self.buffered_at = time.perf_counter()
+
+        batch = self.outbox[wid]
+        batch.append(data)
+        self.n_buffered += 1
+        self.moved[self.wid] += 1
+
+        if self.backlog is not None and data[0] == 'msg':
+            self.backlog.sent[self.wid * self.n_workers + wid] += 1
+
+        if self.trace is not None:
+            self.traced_send(wid, data)
+
+        if len(batch) >= self.batch_size:
+            self.flush(wid)
+
+    def flush(self, wid=None):
+        if wid is None:
+            # Pass partial results one level up the tree.
+            for list_id in self.forward:
+                partial = self.partials.pop(list_id)
+                self.send(self.parent(list_id), ('partial', list_id, partial))
+
+            self.forward.clear()
+
+        wids = range(self.n_workers) if wid is None else (wid, )
+
+        for wid in wids:
+            batch = self.outbox[wid]
+
+            if batch:
+                # Buffers in messages are only passed out of band from
+                # batches, see stream.Messages.
+                if len(batch) > 1 or type(batch[0][1]) in (bytes, bytearray):
+                    self.post(wid, batched(batch))
+                else:
+                    self.post(wid, batch[0])
+
+                self.outbox[wid] = []
+                self.n_buffered -= len(batch)
+
+    def post(self, wid, data):
+        self.term.sent[self.wid] += 1
+        self.mailbox.put(wid, data)
+
+    def steal(self):
+        if self.n_workers == 1:
+            return
+
+        # Ask peers in turn.
+        self.victim = (self.victim + 1) % self.n_workers
+        if self.victim == self.wid:
+            self.victim = (self.victim + 1) % self.n_workers
+
+        self.steal_pending = True
+        self.mailbox.put(self.victim, ('steal', self.wid))
+
+    def stop(self):
+        for wid in range(self.n_workers):
+            self.mailbox.put(wid, ('stop', ))
+
+    def due(self):
+        # A checkpoint is due once the interval has passed, worker 0 requests
+        # it from the others.
+        elapsed = time.perf_counter() - self.checkpointed_at
+        expired = elapsed >= self.checkpoint_interval
+
+        if self.barrier is None:
+            return expired
+
+        requested = self.barrier.requested
+
+        if self.wid == 0 and expired and requested[0] == self.epoch:
+            requested[0] = self.epoch + 1
 
-    def run(self, sessions, session_lock):
+        return requested[0] > self.epoch
+
+    def checkpoint(self):
+        # Pause until the net is drained, save the state and wait for the
+        # peers to have saved theirs, see Checkpoints. Messages still on the
+        # way are received into the state, but no task is executed or given
+        # away meanwhile. False on stop.
+        epoch = self.barrier.requested[0]
+        start = time.perf_counter_ns()
+
+        if self.n_buffered or self.forward:
+            self.flush()
+
+        for sink in self.sinks:
+            sink.flush()
+
+        self.barrier.paused[self.wid] = epoch
+
+        if not self.pause(lambda: self.barrier.drained(epoch, self.term)):
+            return False
+
+        self.save(epoch)
+        self.barrier.taken[self.wid] = epoch
+
+        if not self.pause(lambda: self.barrier.done(epoch)):
+            return False
+
+        self.epoch = epoch
+        self.checkpointed_at = time.perf_counter()
+
+        if self.trace is not None:
+            self.trace.span('checkpoint', 'checkpoint', start,
+                            (EPOCH, epoch))
+
+        return True
+
+    def pause(self, until):
+        while not until():
+            try:
+                r = self.mailbox.get(True, self.poll_interval)
+            except Empty:
+                continue
+
+            if r[0] == 'steal':
+                self.mailbox.put(r[1], ('nosteal', ))
+
+            elif not self.take(r):
+                return False
+
+        return True
+
+    def save(self, epoch):
+        # The store pickles the parts before returning, so they are taken as
+        # they are while the net is paused.
+        self.store.save(epoch, {
+            'tasks': self.tasks,
+            'suspended': self.tasks_suspended,
+            'sessions': self.sessions,
+            'partials': self.partials,
+            'forward': self.forward,
+            'joins': self.joins,
+            'parked': self.parked,
+            'position': self.position,
+        })
+
+    def restore(self, epoch, state):
+        # Go on from a checkpoint, see checkpoint.latest.
+        self.tasks = deque(state['tasks'])
+        self.tasks_suspended = state['suspended']
+        self.sessions = state['sessions']
+        self.partials = state['partials']
+        self.forward = state['forward']
+        self.joins = state['joins']
+        self.parked = deque(state['parked'])
+        self.position = state['position']
+        self.epoch = epoch
+
+        if self.forward:
+            self.buffered_at = time.perf_counter()
+
+    def start(self, term, moved):
+        self.term = term
+        self.moved = moved
+
+        if self.store is not None:
+            self.store.start()
+
+        failed = False
+
+        try:
+            self.run()
+            self.check_joins()
+
+            for sink in self.sinks:
+                sink.flush()
+
+        except BaseException:
+            # Do not leave the peers waiting for a failed worker, the stop
+            # must reach them before the worker exits.
+            failed = True
+            self.stop()
+            raise
+
+        finally:
+            self.mailbox.close(flush=failed)
+
+            if self.store is not None:
+                self.store.stop()
+
+            if self.reports is not None:
+                self.reports.put((self.profile, self.trace))
+
+    def run(self):
 
         while self.event_loop():
 
@@ -93,194 +666,796 @@ class Worker:
             # Sanity check for id completeness.
             assert not (len(task.id) % 2)
 
-            bb_name, index = task.pc
-            bb_stmts = self.cfg.node[bb_name]['stmts']
-            func, inputs, outputs = bb_stmts[index]
+            self.execute(task)
 
-            if len(inputs) == 1:
-                # Execute vertex
-                assert inputs[0] == task.channel
+            del task
 
-                if func.cat == 'transductor':
+    def check_joins(self):
+        # Messages still waiting once the net has terminated have no match
+        # on another input, see join.
+        if self.joins:
+            n = sum(len(slot) for slots in self.joins.values()
+                    for slot in slots)
+            raise RuntimeError('%d messages of joined inputs were never '
+                               'matched' % n)
 
-                    output = func(task.channel, task.content)
+    def call(self, pc, func, args, done):
+        # Run the box of the vertex at `pc' and pass its result on, see
+        # AsyncWorker.
+        done(func(*args))
 
-                    # For now expect transductors eager to have easier bracket
-                    # handling.
-                    assert len(outputs) == len(output)
+    def timed_call(self, pc, func, args, done, clock=time.perf_counter_ns):
+        # Only the box is timed, not the handling of its output. This is
+        # timed() inlined, as cheap boxes are called many times.
+        start = clock()
+        output = func(*args)
+        elapsed = clock() - start
 
-                    for port, (channel, msg) in enumerate(zip(outputs, output)):
+        counters = self.counters[pc]
+        counters[CALLS] += 1
+        counters[TIME] += elapsed
 
-                        next_pc = self.cfg.next_pc(task.pc, channel)
+        if elapsed > counters[MAX]:
+            counters[MAX] = elapsed
 
-                        m = Message(msg, task.id_eye(port), task.bracket)
-                        m.set_loc(channel, next_pc)
+        done(output)
 
-                        self.tasks.append(m)
+    def timed_folder(self, pc, func):
+        # The box of a reductor as called by partials, see Partial.
+        folder = self.folders.get(pc)
 
-                elif func.cat == 'inductor':
+        if folder is None:
+            counters = self.counters[pc]
+            clock = time.perf_counter_ns
 
-                    output = func(task.channel, task.content)
+            def folder(*args):
+                start = clock()
+                acc = func(*args)
+                timed(counters, clock() - start)
+                return acc
 
-                    # Lists corresponding to outputs of each port.
-                    seqs = ([item] for item in output)
+            self.folders[pc] = folder
 
-                    # Iterate inductor until continuation is not issues.
-                    # NOTE: in current implementation the whole sequence is
-                    # generated in one execution step while originally it was
-                    # supposed to output it `lazyly'.
-                    while func.cont:
-                        output = func(None, func.cont)
-                        seqs = map(lambda a, b: a + [b], seqs, output)
+        return folder
 
-                    # --
+    def traced(self, task):
+        # Task execution as a span on the timeline of the worker.
+        func = self.stmt(task.pc)[0]
 
-                    task_seqs = tuple([] for i in outputs)
+        start = time.perf_counter_ns()
+        type(self).execute(self, task)
+        self.trace.span(func.cat, func.name, start,
+                        (MESSAGE, task.id, task.channel))
 
-                    for port, (channel, seq, ts) in enumerate(zip(outputs, seqs, task_seqs)):
+    def traced_send(self, wid, data):
+        if data[0] == 'msg':
+            self.trace.instant('send', 'send', (SENT, wid, data[2], data[4]))
 
-                        next_pc = self.cfg.next_pc(task.pc, channel)
+        elif data[0] == 'partial':
+            self.trace.instant('send', 'partial', (SENT_PARTIAL, wid, data[1]))
 
-                        for index, msg in enumerate(seq):
+        elif data[0] == 'tasks':
+            self.trace.instant('send', 'stolen', (SENT_STOLEN, wid,
+                                                  len(data[1])))
 
-                            m = Message(msg, task.id_up(port, index))
-                            m.set_loc(channel, next_pc)
+    def traced_receive(self, r):
+        if r[0] == 'msg':
+            self.trace.instant('receive', 'receive', (MESSAGE, r[2], r[4]))
 
-                            ts.append(m)
+        elif r[0] == 'partial':
+            self.trace.instant('receive', 'partial', (ID, r[1]))
 
-                        ts[-1].sm_inc(task.bracket)
-                        #print(ts[-1], ts[-1].content)
+        elif r[0] == 'tasks':
+            self.trace.instant('receive', 'stolen', (STOLEN, len(r[1])))
 
-                    # TODO: proper task distribution. Critical part of
-                    # performance, implement something more sophisticated.
-                    tasks_parted = utils.partition(chain(*task_seqs),
-                                                   self.n_workers)
+    def execute(self, task):
+        func, inputs, outputs = self.stmt(task.pc)
 
-                    self.tasks.extend(tasks_parted[self.wid])
+        if len(inputs) != 1 and task.channel is not None:
+            # Synchronisation point for inputs
+            self.join(task, func, inputs, outputs)
+            return
 
-                    for wid, tasks in enumerate(tasks_parted):
-                        if wid != self.wid:
-                            for t in tasks:
-                                self.send(wid, t.dump())
+        # Execute vertex, inductor continuations have no channel.
+        assert task.channel in (inputs[0], None)
 
-                elif func.cat == 'reductor':
-                    # For simplicity temporarily assume a single output port
-                    port = 0
-                    channel = outputs[0]
+        if self.profile is not None and task.channel is not None and \
+                func.cat != 'reductor':
+            self.counters[task.pc][IN] += 1
 
-                    # Initialise continuation
-                    func.cont = None
+        if func.cat == 'transductor':
+            self.call(task.pc, func, (task.channel, task.content),
+                      lambda output: self.transduced(task, outputs, output))
+
+        elif func.cat == 'inductor':
+
+            if task.channel is None:
+                # Continuation of an induction, boxes of several inputs take
+                # it as a tuple of their arguments.
+                index, cont = task.content
+                args = (None, cont) if len(inputs) == 1 else (None, ) + cont
+
+            else:
+                index = 0
+                args = (task.channel, task.content)
 
-                    index = task.id[-1]
-                    list_id = task.id[:-1]
+            self.call(task.pc, func, args,
+                      lambda output: self.induced(task, outputs, index,
+                                                  *output))
 
-                    # ---
-                    stop = False
-                    session_lock.acquire()
+        elif func.cat == 'reductor':
+            self.reduce(task, func)
 
-                    if index == 0:
-                        sessions[list_id] = 0
+        elif func.cat == 'output':
+            # Called through `call' all the same, so that the output is
+            # profiled as any other box.
+            self.call(task.pc, func, (self.program.channels[task.channel],
+                                      (task.content, task.id)), ignore)
 
-                    else:
-                        if list_id not in sessions or sessions[list_id] != index:
-                            # Suspend task
-                            sessions[task.id] = self.wid
-                            self.tasks_suspended[task.id] = task
-                            stop = True
+    def join(self, task, func, inputs, outputs):
+        # Messages of the inputs are matched by the indices in their ids,
+        # which transductors keep, and joined by the home worker of the
+        # indices. Only transductors and inductors have several inputs, see
+        # Program.
+        owner = self.owner(task.id)
 
-                        else:
-                            func.cont = sessions[list_id + (-1,)]
+        if owner != self.wid:
+            self.send(owner, task.dump())
+            return
 
-                    session_lock.release()
+        if self.profile is not None:
+            self.counters[task.pc][IN] += 1
 
-                    if stop:
-                        continue
-                    # ---
+        key = (task.pc, task.id[1::2])
+        slots = self.joins.get(key)
 
-                    func(task.channel, task.content)
+        if slots is None:
+            slots = self.joins[key] = tuple(deque() for c in inputs)
+
+        slots[inputs.index(task.channel)].append(task)
+
+        if not all(slots):
+            return
+
+        # Fire once every input has a message, the entry is evicted when the
+        # last queued message is taken.
+        msgs = [slot.popleft() for slot in slots]
+
+        if not any(slots):
+            del self.joins[key]
+
+        task = msgs[0]
+        args = (None, ) + tuple(m.content for m in msgs)
+
+        if func.cat == 'transductor':
+            self.call(task.pc, func, args,
+                      lambda output: self.transduced(task, outputs, output))
+
+        else:
+            self.call(task.pc, func, args,
+                      lambda output: self.induced(task, outputs, 0, *output))
 
-                    if task.bracket is not None:
-                        # End of reduction
-                        m = Message(func.cont, task.id_down(port))
-                        m.sm_dec(task.bracket)
+    def transduced(self, task, outputs, output):
 
-                        next_pc = self.cfg.next_pc(task.pc, channel)
-                        m.set_loc(channel, next_pc)
+        # For now expect transductors eager to have easier bracket
+        # handling.
+        assert len(outputs) == len(output)
 
-                        self.tasks.append(m)
+        if self.profile is not None:
+            self.counters[task.pc][OUT] += len(output)
 
-                    else:
-                        session_lock.acquire()
+        for port, (channel, msg) in enumerate(zip(outputs, output)):
 
-                        # Save intermediate result
-                        sessions[list_id] += 1
-                        sessions[list_id + (-1,)] = func.cont
+            next_pc = self.program.next_pc(task.pc, channel)
 
-                        next_task = list_id + (index+1,)
+            m = Message(msg, task.id_eye(port), task.bracket)
+            m.set_loc(channel, next_pc)
 
-                        if next_task in self.tasks_suspended:
-                            # Locally suspended
-                            self.tasks.append(self.tasks_suspended[next_task])
+            self.tasks.append(m)
 
-                        elif next_task in sessions:
-                            self.send(sessions[next_task], ('wakeup', next_task))
+    def induced(self, task, outputs, index, output, cont):
 
-                        else:
-                            pass
+        # Emit a single step, elements of the list are sent downstream as soon
+        # as they are produced.
+        wids = []
 
-                        session_lock.release()
+        if self.profile is not None:
+            self.counters[task.pc][OUT] += len(output)
 
+        for port, (channel, msg) in enumerate(zip(outputs, output)):
 
-                elif func.cat == 'output':
-                    func(task.channel, (task.content, task.id))
+            next_pc = self.program.next_pc(task.pc, channel)
 
+            m = Message(msg, task.id_up(port, index))
+            m.set_loc(channel, next_pc)
+
+            if cont is None:
+                # Last element of the list.
+                m.sm_inc(task.bracket)
+
+            if self.locality and (not self.stealing or
+                                  self.stmt(next_pc)[0].cat == 'reductor'):
+                # The list is kept whole on its home worker. With stealing
+                # only lists going to a reductor are, other elements stay
+                # with the worker that has produced them.
+                wid = self.owner(m.id[:-1])
             else:
-                # Synchronisation point for inputs
-                pass
+                wid = self.wid if self.stealing else index % self.n_workers
+
+            if wid == self.wid:
+                self.tasks.append(m)
+            else:
+                self.send(wid, m.dump())
+
+            wids.append(wid)
+
+        if cont is not None:
+            # Reschedule the continuation as a separate task queued after the
+            # elements it has produced.
+            c = Message((index + 1, cont), task.id, task.bracket)
+            c.set_loc(None, task.pc)
+
+            if self.bounded and self.congested(wids):
+                # Downstream queues are full, resume the induction later.
+                self.parked.append((c, wids))
+            else:
+                self.tasks.append(c)
+
+    def congested(self, wids):
+        for wid in wids:
+            if wid == self.wid:
+                if self.capacity is not None and \
+                        len(self.tasks) >= self.capacity:
+                    return True
+
+            elif self.backlog is not None:
+                if self.capacity is not None and \
+                        self.backlog.queued[wid] >= self.capacity:
+                    return True
+
+                if self.window is not None and \
+                        self.backlog.inflight(wid) >= self.window:
+                    return True
+
+        return False
+
+    def unpark(self):
+        # Resume parked inductions whose workers have room again.
+        for i in range(len(self.parked)):
+            c, wids = self.parked.popleft()
+
+            if self.congested(wids):
+                self.parked.append((c, wids))
+            else:
+                self.tasks.append(c)
+
+    def reduce(self, task, func):
+        # For simplicity temporarily assume a single output port
+        port = 0
+
+        index = task.id[-1]
+        list_id = task.id[:-1]
+
+        # Async reductors are folded an element at a time, see AsyncWorker.
+        if (not func.ordered or func.associative) and not func.is_async:
+            # Fold into the local partial result of the list, partials are
+            # combined up the owner's tree.
+            if self.profile is not None:
+                self.counters[task.pc][IN] += 1
+
+            partial = self.partials.get(list_id)
+
+            if partial is None:
+                partial = Partial(task.pc, func.ordered)
+                self.partials[list_id] = partial
+
+            if self.profile is not None:
+                func = self.timed_folder(task.pc, func)
+
+            partial.add(func, index, index + 1, task.content)
+
+            if task.bracket is not None:
+                partial.last = (index + 1, task.bracket, task.id_down(port))
+
+            self.settle(list_id)
+            return
+
+        # Elements of a list are reduced by its owner.
+        owner = self.owner(list_id)
+
+        if owner != self.wid:
+            self.send(owner, task.dump())
+            return
+
+        def done(acc):
+            if task.bracket is not None:
+                # End of reduction
+                self.reduced(task.pc, acc, task.id_down(port), task.bracket)
+                return
+
+            # Save intermediate result
+            self.sessions[list_id] = (index + 1, acc)
+
+            next_task = list_id + (index + 1, )
+
+            if next_task in self.tasks_suspended:
+                self.tasks.append(self.tasks_suspended.pop(next_task))
+
+                if self.profile is not None:
+                    elapsed = time.perf_counter_ns() - \
+                        self.suspended_at.pop(next_task)
+                    self.counters[task.pc][SUSPENDED] += elapsed
+
+                if self.trace is not None:
+                    self.trace.end('suspend', func.name, next_task)
+
+        # A suspended message is only counted once it is folded.
+        if index == 0:
+            if self.profile is not None:
+                self.counters[task.pc][IN] += 1
+
+            done(task.content)
+
+        elif self.sessions.get(list_id, (None, ))[0] == index:
+            if self.profile is not None:
+                self.counters[task.pc][IN] += 1
+
+            # The session is taken until the element is folded.
+            acc = self.sessions.pop(list_id)[1]
+            self.call(task.pc, func, (task.channel, acc, task.content), done)
+
+        else:
+            # Suspend task until its predecessor is reduced.
+            self.tasks_suspended[task.id] = task
+
+            if self.profile is not None:
+                self.suspended_at[task.id] = time.perf_counter_ns()
+
+            if self.trace is not None:
+                self.trace.begin('suspend', func.name, task.id,
+                                 (ID, task.id))
+
+
+class SequentialWorker(Worker):
+    # Runs the whole net in the calling process. There are no peers, so all
+    # lists are owned locally and nothing is ever sent: tasks are taken
+    # straight from the deque.
+
+    def __init__(self, program, tasks, capacity=None, source=None,
+                 profile=False, trace=False, store=None,
+                 checkpoint_interval=1.0):
+        super().__init__(0, program, tasks, LocalTransport(1),
+                         capacity=capacity, source=source, profile=profile,
+                         trace=trace, store=store,
+                         checkpoint_interval=checkpoint_interval)
+
+    def checkpoint(self):
+        # Nothing is ever in transit, the state is consistent between tasks.
+        start = time.perf_counter_ns()
+
+        for sink in self.sinks:
+            sink.flush()
+
+        self.epoch += 1
+        self.save(self.epoch)
+        self.checkpointed_at = time.perf_counter()
+
+        if self.trace is not None:
+            self.trace.span('checkpoint', 'checkpoint', start,
+                            (EPOCH, self.epoch))
+
+        return True
+
+    def run(self):
+        if self.store is None:
+            self.run_tasks()
+            return
+
+        self.store.start()
+
+        try:
+            self.run_tasks()
+        finally:
+            self.store.stop()
+
+    def run_tasks(self):
+        tasks = self.tasks
+        parked = self.parked
+        execute = self.execute
+        store = self.store
+
+        while True:
+            if store is not None and self.due():
+                self.checkpoint()
+
+            if parked:
+                self.unpark()
+
+            if self.source is not None and len(tasks) < self.batch_size:
+                self.inject()
+
+            if not tasks:
+                break
+
+            for i in range(min(len(tasks), self.poll_every)):
+                execute(tasks.popleft())
+
+            for sink in self.sinks:
+                sink.expire()
+
+        self.check_joins()
+
+        for sink in self.sinks:
+            sink.flush()
+
+
+class AsyncWorker(SequentialWorker):
+    # Runs the net on an asyncio event loop. Boxes defined with `async def'
+    # are started as coroutines and their results are handled on completion,
+    # so the waits of many messages overlap. At most limits[pc] coroutines
+    # run at a time at the vertex at `pc', or limits[name] at each vertex of
+    # the box `name'.
+
+    def __init__(self, program, tasks, limits=None, source=None,
+                 profile=False, trace=False):
+        super().__init__(program, tasks, source=source, profile=profile,
+                         trace=trace)
+
+        self.limits = limits or {}
+        self.semaphores = {}
+
+        self.inflight = 0
+        self.wakeup = None
+
+    def call(self, pc, func, args, done):
+        if not func.is_async:
+            done(func(*args))
+            return
+
+        if pc not in self.semaphores:
+            limit = self.limits.get(pc, self.limits.get(func.name))
+            self.semaphores[pc] = asyncio.Semaphore(limit) if limit else None
+
+        # The coroutine only starts once the semaphore is taken.
+        if self.profile is None:
+            coro = func(*args)
+        else:
+            coro = self.timed_coro(pc, func, args)
+
+        self.inflight += 1
+        asyncio.ensure_future(self.job(self.semaphores[pc], coro, done))
+
+    def timed_call(self, pc, func, args, done):
+        if func.is_async:
+            AsyncWorker.call(self, pc, func, args, done)
+        else:
+            super().timed_call(pc, func, args, done)
+
+    async def timed_coro(self, pc, func, args):
+        start = time.perf_counter_ns()
+        result = await func(*args)
+        timed(self.counters[pc], time.perf_counter_ns() - start)
+
+        return result
+
+    async def job(self, semaphore, coro, done):
+
+        try:
+            if semaphore is None:
+                result = await coro
+            else:
+                async with semaphore:
+                    result = await coro
+
+            done(result)
+
+        finally:
+            self.inflight -= 1
+            self.wakeup.set()
+
+    async def run_async(self, yield_every=64):
+        self.wakeup = asyncio.Event()
+
+        while True:
+            if self.source is not None and len(self.tasks) < yield_every:
+                self.inject()
+
+            for i in range(min(len(self.tasks), yield_every)):
+                task = self.tasks.popleft()
+
+                # Sanity check for id completeness.
+                assert not (len(task.id) % 2)
+
+                self.execute(task)
+
+            for sink in self.sinks:
+                sink.expire()
+
+            if self.tasks:
+                # Let started coroutines make progress.
+                await asyncio.sleep(0)
+
+            elif self.inflight:
+                idle_from = None if self.trace is None else \
+                    time.perf_counter_ns()
+
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                self.woke(idle_from)
+
+            elif self.source is None:
+                break
+
+        self.check_joins()
+
+        for sink in self.sinks:
+            sink.flush()
 
-            del task
 
 #------------------------------------------------------------------------------
 
+def batched(items):
+    # Items for another worker as a single one, messages are packed into
+    # columns, see stream.Messages.
+    msgs = [r for r in items if r[0] == 'msg']
+    others = [r for r in items if r[0] != 'msg']
+
+    return ('batch', Messages(msgs), others)
+
+
+def ignore(output):
+    # Outputs have no result.
+    pass
+
+
+def read(program, __input__):
+    # Messages of the inputs of a net, see stream.items. Channels are read in
+    # turn, a message at a time, so that none waits for the end of another.
+    # Each channel is a top-level list of its own, indexed from 0.
+    def messages(list_id, channel, msgs):
+        stream_factory = Stream()
+        stream_factory.list_ids[0] = list_id
+
+        init_pc = (program.entry[channel], 0)
+        channel_id = program.channel_ids[channel]
+
+        for msg in stream_factory.iread(items(msgs)):
+            msg.channel = channel_id
+            msg.pc = init_pc
+            yield msg
+
+    channels = deque(messages(list_id, channel, msgs)
+                     for list_id, (channel, msgs)
+                     in enumerate(__input__.items()))
+
+    while channels:
+        msg = next(channels[0], None)
+
+        if msg is None:
+            channels.popleft()
+            continue
+
+        yield msg
+        channels.rotate(-1)
+
+
 class Runner:
 
-    def __init__(self, cfg, __input__, n_workers=2):
+    def __init__(self, cfg, __input__, n_workers=None, scheduler='stealing',
+                 transport=None, batch_size=64, flush_interval=0.001,
+                 backend=None, limits=None, placement='locality',
+                 capacity=None, window=None, profile=None, trace=None,
+                 checkpoint=None, checkpoint_interval=1.0, resume=False):
+
+        if backend is None:
+            # A single worker needs neither processes nor a transport.
+            backend = 'sequential' if n_workers == 1 else 'processes'
+
+        if n_workers is None:
+            n_workers = 1 if backend in ('sequential', 'asyncio') else 2
+
+        assert backend in ('processes', 'threads', 'sequential', 'asyncio')
+
+        # Workers run the graph lowered to a program.
+        program = cfg if isinstance(cfg, Program) else Program.lower(cfg)
+        program.check()
+
+        if backend != 'asyncio' and \
+                any(f.is_async for f in program.boxes()):
+            raise ValueError('Async boxes require the asyncio backend')
 
-        self.tasks = []
         self.workers = []
         self.processes = None
+        self.backend = backend
+        self.moved = Array('q', n_workers, lock=False)
+        self.sinks = [f for f in program.outputs() if isinstance(f, Sink)]
+
+        # Profiles of the workers are merged into `profile' and written to
+        # the given path, if any. Their traces are collected into `traces'
+        # and written to a single trace file.
+        self.profile = Profile() if profile else None
+        self.profile_path = profile if isinstance(profile, str) else None
+        self.traces = [] if trace else None
+        self.trace_path = trace if isinstance(trace, str) else None
+        self.reports = None
+        self.reported = None
+
+        if (profile or trace) and backend == 'processes':
+            self.reports = Queue()
+
+        # Workers save checkpoints into the directory `checkpoint' and, with
+        # `resume', go on from the latest one found there. The input is then
+        # read from where it had been taken up to.
+        resumed = None
+
+        if checkpoint is not None and resume:
+            resumed = latest(checkpoint)
+
+        if resumed is not None and len(resumed[1]) != n_workers:
+            raise ValueError('Checkpoint of %d workers cannot be resumed by %d'
+                             % (len(resumed[1]), n_workers))
+
+        if checkpoint is not None and backend == 'asyncio':
+            raise ValueError('Checkpoints are not supported by the asyncio '
+                             'backend')
+
+        if backend == 'asyncio':
+            # Options of the other backends.
+            options = [('n_workers', n_workers, 1),
+                       ('scheduler', scheduler, 'stealing'),
+                       ('transport', transport, None),
+                       ('placement', placement, 'locality'),
+                       ('capacity', capacity, None),
+                       ('window', window, None)]
+
+            ignored = [name for name, value, default in options
+                       if value != default]
+
+            if ignored:
+                raise ValueError('Not supported by the asyncio backend: %s'
+                                 % ', '.join(ignored))
+
+        elif limits is not None:
+            raise ValueError('Limits are only supported by the asyncio '
+                             'backend')
+
+        if checkpoint is not None:
+            discard(checkpoint, None if resumed is None else resumed[0])
+
+        # Input is read lazily by the first worker, see read.
+        source = read(program, __input__)
+
+        if resumed is not None:
+            position = sum(state['position'] for state in resumed[1])
+            source = islice(source, position, None)
+
+        if backend == 'asyncio':
+            # A single event loop runs the whole net.
+            self.workers = [AsyncWorker(program, (), limits, source,
+                                        bool(profile), bool(trace))]
+            return
+
+        if backend == 'sequential':
+            store = None if checkpoint is None else Store(checkpoint, 0, 1)
+
+            self.workers = [SequentialWorker(program, (), capacity, source,
+                                             bool(profile), bool(trace), store,
+                                             checkpoint_interval)]
+            self.resume(resumed)
+            return
+
+        if transport is None:
+            # Threads share memory, messages need not be pickled.
+            transport = 'queue' if backend == 'processes' else 'local'
+
+        assert backend == 'threads' or transport != 'local'
+
+        self.transport = transports[transport](n_workers)
+
+        if capacity is not None or window is not None:
+            backlog = Backlog(n_workers)
+        else:
+            backlog = None
 
-        stream_factory = Stream()
+        barrier = None if checkpoint is None else Checkpoints(n_workers)
 
-        for channel, msgs in __input__.items():
+        self.workers = [Worker(wid, program, (), self.transport, scheduler,
+                               batch_size=batch_size,
+                               flush_interval=flush_interval,
+                               placement=placement, capacity=capacity,
+                               window=window, backlog=backlog,
+                               source=None if wid else source,
+                               profile=bool(profile), trace=bool(trace),
+                               reports=self.reports,
+                               store=None if checkpoint is None
+                               else Store(checkpoint, wid, n_workers),
+                               barrier=barrier,
+                               checkpoint_interval=checkpoint_interval)
+                        for wid in range(n_workers)]
 
-            stream = stream_factory.read(msgs)
+        self.resume(resumed)
 
-            init_pc = (cfg.entry[channel], 0)
+        if resumed is not None:
+            barrier.restore(resumed[0])
 
-            for msg in stream:
-                msg.channel = channel
-                msg.pc = init_pc
-                self.tasks.append(msg)
+    def resume(self, resumed):
+        if resumed is not None:
+            epoch, states = resumed
 
-            tasks_parted = utils.partition(self.tasks, n_workers)
+            for w, state in zip(self.workers, states):
+                w.restore(epoch, state)
 
-            queues = [Queue() for i in range(n_workers)]
+    def run(self):
+        # Sinks are written from this process while the workers run.
+        for sink in self.sinks:
+            sink.start(self.backend == 'processes')
 
-            self.workers = [Worker(wid, cfg, tasks, queues)
-                            for wid, tasks in enumerate(tasks_parted)]
+        try:
+            self.run_workers()
 
-    def run(self):
-        manager = Manager()
+        finally:
+            for sink in self.sinks:
+                sink.stop()
+
+        if self.reports is None:
+            self.reported = [(w.profile, w.trace) for w in self.workers]
+
+        if self.profile is not None:
+            for profile, trace in self.reported:
+                self.profile.merge(profile)
+
+            if self.profile_path is not None:
+                self.profile.dump(self.profile_path)
+
+        if self.traces is not None:
+            self.traces = [trace for profile, trace in self.reported]
+
+            if self.trace_path is not None:
+                Trace.dump(self.trace_path, self.traces)
+
+    def run_workers(self):
+
+        if self.backend == 'asyncio':
+            asyncio.run(self.workers[0].run_async())
+            return
 
-        sessions = manager.dict()
-        session_lock = Lock()
+        if self.backend == 'sequential':
+            self.workers[0].run()
+            return
 
-        self.processes = [Process(target=w.run, args=(sessions, session_lock))
+        term = Termination(len(self.workers))
+
+        try:
+            if self.backend == 'threads':
+                with ThreadPoolExecutor(len(self.workers)) as pool:
+                    futures = [pool.submit(w.start, term, self.moved)
+                               for w in self.workers]
+
+                for f in futures:
+                    f.result()
+
+            else:
+                self.run_processes(term)
+
+        finally:
+            self.transport.release()
+
+    def run_processes(self, term):
+        self.processes = [Process(target=w.start, args=(term, self.moved))
                           for w in self.workers]
 
         for p in self.processes:
             p.start()
 
+        if self.reports is not None:
+            # A worker only exits once its report is taken.
+            self.reported = [self.reports.get() for w in self.workers]
+
         for p in self.processes:
             p.join()
+
+        # A failed worker stops its peers, the output is incomplete.
+        for wid, p in enumerate(self.processes):
+            if p.exitcode:
+                raise RuntimeError('Worker %d has failed with exit code %d'
+                                   % (wid, p.exitcode))
@@ -0,0 +1,101 @@
+from multiprocessing import Array
+
+__all__ = ['Termination', 'Backlog', 'Checkpoints', 'steal_half', 'home']
+
+
+class Termination:
+    # Distributed termination detection for a set of workers exchanging
+    # messages.
+    #
+    # Each worker owns its slots in the shared arrays and updates them
+    # without locking:
+    #   - `sent' is incremented before a work-carrying message is put into a
+    #     queue,
+    #   - `recv' is incremented after the receiver has cleared its `idle'
+    #     flag.
+    #
+    # The computation is over if all workers are idle and no message is in
+    # transit. Counters are read twice around the scan of idle flags, so a
+    # message received in between is always noticed.
+
+    def __init__(self, n_workers):
+        self.sent = Array('q', n_workers, lock=False)
+        self.recv = Array('q', n_workers, lock=False)
+        self.idle = Array('b', n_workers, lock=False)
+
+    def detect(self):
+        sent, recv = sum(self.sent), sum(self.recv)
+
+        if sent != recv or not all(self.idle):
+            return False
+
+        return sum(self.sent) == sent and sum(self.recv) == recv
+
+
+class Backlog:
+    # Work queued at each worker, read by producers to apply backpressure.
+    #
+    # Slots are written by a single worker each:
+    #   - sent[src * n_workers + dst] counts messages from `src' to `dst',
+    #   - arrived[dst] counts messages taken by `dst' from its mailbox,
+    #   - queued[dst] is the length of the task queue of `dst' as of its last
+    #     look into the mailbox.
+
+    def __init__(self, n_workers):
+        self.n_workers = n_workers
+        self.sent = Array('q', n_workers * n_workers, lock=False)
+        self.arrived = Array('q', n_workers, lock=False)
+        self.queued = Array('q', n_workers, lock=False)
+
+    def inflight(self, wid):
+        # Messages sent to the worker and not yet received.
+        return sum(self.sent[wid::self.n_workers]) - self.arrived[wid]
+
+
+class Checkpoints:
+    # Barrier of the workers around a checkpoint, see Worker.checkpoint.
+    #
+    # Worker 0 requests epoch e by setting requested[0] to e. Each worker
+    # then stops executing tasks and sets its slot of `paused' to e: the net
+    # is drained once all of them are paused and every work-carrying message
+    # has been received, see Termination. Workers save their state, set their
+    # slot of `taken' to e and go on once all of them have.
+
+    def __init__(self, n_workers):
+        self.requested = Array('q', 1, lock=False)
+        self.paused = Array('q', n_workers, lock=False)
+        self.taken = Array('q', n_workers, lock=False)
+
+    def drained(self, epoch, term):
+        if not all(e >= epoch for e in self.paused):
+            return False
+
+        return sum(term.sent) == sum(term.recv)
+
+    def done(self, epoch):
+        return all(e >= epoch for e in self.taken)
+
+    def restore(self, epoch):
+        # Epochs go on from a checkpoint the net is resumed from.
+        self.requested[0] = epoch
+
+        for i in range(len(self.paused)):
+            self.paused[i] = self.taken[i] = epoch
+
+
+def steal_half(tasks):
+    # Take the newer half of the victim's deque: the owner pops tasks from the
+    # left, thieves take them from the right.
+    n = len(tasks) // 2
+    stolen = [tasks.pop() for i in range(n)]
+    stolen.reverse()
+    return stolen
+
+
+def home(list_id, n_workers):
+    # Worker of a list. Only the indices in the id are hashed: they are kept
+    # by transductors, which renumber list ids, so a list has the same home at
+    # every vertex down its path. Hashes of int tuples do not depend on the
+    # interpreter instance.
+    return hash(list_id[1::2]) % n_workers
+
@@ -0,0 +1,206 @@
+import csv
+import io
+import json
+import pickle
+import time
+import threading
+from multiprocessing import Queue
+from queue import SimpleQueue
+
+__all__ = ['Sink', 'JsonLines', 'Csv', 'PickleStream', 'Memory']
+
+
+class Sink:
+    # Output box that writes records in bulk.
+    #
+    # Workers encode records into a buffer of their own and pass it on as a
+    # whole once it holds `count' records or `bytes' of data, or `interval'
+    # seconds after its first record. Buffers are written by a thread of the
+    # process running the net, so workers never wait for I/O.
+
+    cat = 'output'
+    is_async = False
+
+    def __init__(self, count=1024, bytes=1 << 20, interval=0.1):
+        self.count = count
+        self.bytes = bytes
+        self.interval = interval
+
+        self.name = type(self).__name__
+        self.queue = None
+        self.writer = None
+        self.local = threading.local()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['local'], state['writer']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.local = threading.local()
+        self.writer = None
+
+    def __call__(self, channel, msg):
+        local = self.local
+
+        if not hasattr(local, 'buffer'):
+            local.buffer = []
+            local.size = 0
+
+        if not local.buffer:
+            local.since = time.perf_counter()
+
+        record = self.encode(channel, *msg)
+        local.buffer.append(record)
+        local.size += len(record)
+
+        if len(local.buffer) >= self.count or local.size >= self.bytes:
+            self.flush()
+        else:
+            self.expire()
+
+    def expire(self):
+        # Pass the buffer on once `interval' has passed, workers check it
+        # between tasks as well.
+        local = self.local
+
+        if getattr(local, 'buffer', None) and \
+                time.perf_counter() - local.since >= self.interval:
+            self.flush()
+
+    def flush(self):
+        buffer = getattr(self.local, 'buffer', None)
+
+        if buffer:
+            self.queue.put(self.join(buffer))
+            self.local.buffer = []
+            self.local.size = 0
+
+    def start(self, processes):
+        # Workers running as processes reach the writer through a pipe.
+        self.queue = Queue() if processes else SimpleQueue()
+        self.open()
+
+        self.writer = threading.Thread(target=self.write_all, daemon=True)
+        self.writer.start()
+
+    def stop(self):
+        self.queue.put(None)
+        self.writer.join()
+        self.close()
+
+    def write_all(self):
+        for data in iter(self.queue.get, None):
+            self.write(data)
+
+    # Record format, overridden by sinks.
+
+    def encode(self, channel, content, id):
+        raise NotImplementedError
+
+    def join(self, buffer):
+        return ''.join(buffer)
+
+    def open(self):
+        pass
+
+    def write(self, data):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FileSink(Sink):
+
+    mode = 'w'
+
+    def __init__(self, path, **policy):
+        super().__init__(**policy)
+        self.path = path
+        self.file = None
+
+    def __repr__(self):
+        return '%s(%r, count=%r, bytes=%r, interval=%r)' % (
+            self.name, self.path, self.count, self.bytes, self.interval)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['file'] = None
+        return state
+
+    def open(self):
+        self.file = open(self.path, self.mode)
+
+    def write(self, data):
+        self.file.write(data)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLines(FileSink):
+    # A JSON object per line: {"channel": .., "content": .., "id": [..]}
+
+    def encode(self, channel, content, id):
+        return json.dumps({'channel': channel, 'content': content,
+                           'id': id}) + '\n'
+
+
+class Csv(FileSink):
+    # Rows of channel, content and the id as space separated numbers.
+
+    def encode(self, channel, content, id):
+        local = self.local
+
+        if not hasattr(local, 'rows'):
+            local.out = io.StringIO()
+            local.rows = csv.writer(local.out)
+
+        local.rows.writerow((channel, content, ' '.join(map(str, id))))
+
+        row = local.out.getvalue()
+        local.out.seek(0)
+        local.out.truncate()
+
+        return row
+
+    def open(self):
+        self.file = open(self.path, self.mode, newline='')
+
+
+class PickleStream(FileSink):
+    # Pickled (channel, content, id) tuples, read back by repeated
+    # pickle.load until EOFError.
+
+    mode = 'wb'
+
+    def encode(self, channel, content, id):
+        return pickle.dumps((channel, content, id), pickle.HIGHEST_PROTOCOL)
+
+    def join(self, buffer):
+        return b''.join(buffer)
+
+
+class Memory(Sink):
+    # Collects (channel, content, id) tuples in `records' of the process
+    # running the net.
+
+    def __init__(self, **policy):
+        super().__init__(**policy)
+        self.records = []
+
+    def __repr__(self):
+        return '%s(count=%r, bytes=%r, interval=%r)' % (
+            self.name, self.count, self.bytes, self.interval)
+
+    def encode(self, channel, content, id):
+        return (channel, content, id)
+
+    def join(self, buffer):
+        return buffer
+
+    def write(self, data):
+        self.records.extend(data)
@@ -1,7 +1,9 @@
+import copyreg
+import json
+from array import array
 from collections import Sequence, defaultdict
+from pickle import PickleBuffer
 from itertools import chain
-from functools import partial
-from . import utils
 
 
 class Stream:
@@ -32,52 +34,77 @@ class Stream:
 
         return s
 
+    def iread(self, seq):
+        # Lazy read() of any iterable: the top level is consumed an item at a
+        # time. A message is yielded once the next one is known, as its
+        # bracket may be set until then.
+        self._clear()
+
+        for item in seq:
+            self._item(item)
+
+            if len(self.stream) > 1:
+                yield from self.stream[:-1]
+                del self.stream[:-1]
+
+        self._exit()
+        yield from self.stream
+
+        self.list_ids[0] += 1
+
     def _scan(self, stream, level=0):
 
         assert isinstance(stream, Sequence)
 
         for item in stream:
+            self._item(item, level)
+
+        self._exit(level)
+
+    def _item(self, item, level=0):
 
-            if isinstance(item, Sequence):
-                # Nested list
+        if isinstance(item, Sequence):
+            # Nested list
 
-                if self.bc > 0:
-                    self.bc -= 1
+            if self.bc > 0:
+                self.bc -= 1
 
-                if self.bc == 0 and self.bmax > 0:
-                    # Bracketing sequence )..)(..( occured
+            if self.bc == 0 and self.bmax > 0:
+                # Bracketing sequence )..)(..( occured
 
-                    self.stream[-1].bracket = self.bmax
-                    self.index = 0
-                    self.bmax = 0
+                self.stream[-1].bracket = self.bmax
+                self.index = 0
+                self.bmax = 0
 
-                self.list_ids[level+1] += 1
+            self.list_ids[level+1] += 1
 
-                self._scan(item, level+1)
+            self._scan(item, level+1)
 
-                self.list_idxs[level] += 1
+            self.list_idxs[level] += 1
 
-            else:
-                # Message
+        else:
+            # Message
+
+            self.depth = level if self.depth is None else self.depth
 
-                self.depth = level if self.depth is None else self.depth
+            # Make sure messages are only found at the innermost sequence.
+            if level != self.depth:
+                raise ValueError('Wrong sequence')
 
-                # Make sure messages are only found at the innermost sequence.
-                if level != self.depth:
-                    raise ValueError('Wrong sequence')
+            # Join list identifiers and indicies
+            lists = ((self.list_ids[i], self.list_idxs[i])
+                     for i in range(level+1))
 
-                # Join list identifiers and indicies
-                lists = ((self.list_ids[i], self.list_idxs[i])
-                         for i in range(level+1))
+            # Flatten ids and indicies, remove trailing 0 and insert msg id
+            mid = tuple(chain(*lists))[:-1] + (self.index, )
 
-                # Flatten ids and indicies, remove trailing 0 and insert msg id
-                mid = tuple(chain(*lists))[:-1] + (self.index, )
+            self.stream.append(
+                Message(item, mid)
+            )
 
-                self.stream.append(
-                    Message(item, mid)
-                )
+            self.index += 1
 
-                self.index += 1
+    def _exit(self, level=0):
 
         for k in filter(lambda x: x > level, self.list_idxs):
             self.list_idxs[k] = 0
@@ -86,11 +113,14 @@ class Stream:
         self.bc += 1
         self.bmax += 1
 
-        if level == 0:
+        # An empty input has no last message.
+        if level == 0 and self.stream:
             self.stream[-1].bracket = 0
 
 
 class Message:
+    # Millions of messages are alive at a time, they have no __dict__.
+    __slots__ = ('content', 'id', 'bracket', 'channel', 'pc')
 
     def __init__(self, content, id, bracket=None):
         self.content = content
@@ -112,12 +142,10 @@ class Message:
         self.pc = pc
 
     def id_up(self, port, index):
-        pre_id = self.id_eye(port)
-
-        ls = b''.join(map(utils.to_bytes, self.id))
-        list_id = utils.md5s(ls, port)
+        # The new list is named after the message and the port.
+        list_id = hash(self.id + (port, ))
 
-        return pre_id + (list_id, index)
+        return self.id_eye(port) + (list_id, index)
 
     def id_down(self, port):
         return self.id_eye(port)[:-2]
@@ -125,9 +153,19 @@ class Message:
     def id_eye(self, port):
         # - dimension and indicies are the same
         # - update list identifiers
-        ids = map(partial(utils.md5i, port), self.id[::2])
-        idxs = self.id[1::2]
-        return tuple(chain(*zip(ids, idxs)))
+        #
+        # Lists of the messages a vertex emits on different ports must not
+        # be mixed up downstream, so list ids are mixed with the port. Port 0
+        # keeps them as they are: ids only need to differ between the ports
+        # of a vertex. Ids are tuples of ints, whose hashes do not depend on
+        # the interpreter instance.
+        if not port:
+            return self.id
+
+        mid = list(self.id)
+        mid[::2] = [hash((list_id, port)) for list_id in mid[::2]]
+
+        return tuple(mid)
 
     def sm_inc(self, sm_init=-1):
         if sm_init != -1:
@@ -155,3 +193,89 @@ class Message:
     def dump(self):
         return ('msg', self.content, self.id, self.bracket,
                 self.channel, self.pc)
+
+
+class Messages:
+    # Messages moving together, such as a batch for another worker, as
+    # columns. Most messages of a batch are elements of a few lists and are
+    # at a few locations, so the lists, the ids without their last index, and
+    # the locations, (bracket, channel, pc), are kept once in tables. Per
+    # message there are only the content and three ints in arrays, which
+    # pickle as raw bytes.
+    __slots__ = ('contents', 'lists', 'indices', 'locs', 'list_ids',
+                 'loc_ids')
+
+    def __init__(self, items=()):
+        # From items ('msg', content, id, bracket, channel, pc), see
+        # Message.dump.
+        list_ids = {}
+        loc_ids = {}
+
+        items = list(items)
+
+        self.contents = [r[1] for r in items]
+        self.lists = array('I', [list_ids.setdefault(r[2][:-1], len(list_ids))
+                                 for r in items])
+        self.indices = array('q', [r[2][-1] for r in items])
+        self.locs = array('I', [loc_ids.setdefault(r[3:], len(loc_ids))
+                                for r in items])
+
+        self.list_ids = tuple(list_ids)
+        self.loc_ids = tuple(loc_ids)
+
+    def __len__(self):
+        return len(self.contents)
+
+    def __iter__(self):
+        list_ids = self.list_ids
+        locs = self.loc_ids
+
+        for content, l, index, loc in zip(self.contents, self.lists,
+                                          self.indices, self.locs):
+            bracket, channel, pc = locs[loc]
+
+            m = Message(content, list_ids[l] + (index, ), bracket)
+            m.channel = channel
+            m.pc = pc
+
+            yield m
+
+    def __getstate__(self):
+        return (self.contents, self.lists, self.indices, self.locs,
+                self.list_ids, self.loc_ids)
+
+    def __reduce_ex__(self, protocol):
+        state = self.__getstate__()
+
+        if protocol >= 5 and not _buffers.isdisjoint(map(type, self.contents)):
+            # Buffers may then be passed out of band, see transport.dumps.
+            # In band they are loaded as they were.
+            contents = [PickleBuffer(c) if type(c) in _buffers else c
+                        for c in self.contents]
+            state = (contents, ) + state[1:]
+
+        return copyreg.__newobj__, (type(self), ), state
+
+    def __setstate__(self, state):
+        (self.contents, self.lists, self.indices, self.locs, self.list_ids,
+         self.loc_ids) = state
+
+
+_buffers = {bytes, bytearray}
+
+
+def items(source):
+    # Top-level items of a channel input: a sequence or any iterable, a file
+    # object such as a pipe, or the path of a file. Files hold a JSON item per
+    # line and are read as the net consumes them.
+    if isinstance(source, str):
+        with open(source) as f:
+            yield from items(f)
+
+    elif hasattr(source, 'readline'):
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+    else:
+        yield from source
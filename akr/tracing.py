@@ -0,0 +1,85 @@
+import json
+from time import perf_counter_ns
+
+__all__ = ['Trace']
+
+# Keys of the args of events. Args are recorded as a tuple of the keys and
+# the values, `(MESSAGE, id, channel)', and only turned into dicts on export.
+# Channels are recorded by number.
+MESSAGE = ('id', 'channel')
+SENT = ('to', 'id', 'channel')
+SENT_PARTIAL = ('to', 'id')
+SENT_STOLEN = ('to', 'tasks')
+ID = ('id', )
+STOLEN = ('tasks', )
+EPOCH = ('epoch', )
+
+
+class Trace:
+    # Activity of a worker in the Chrome trace-event format, as loaded by
+    # chrome://tracing and Perfetto.
+    #
+    # Events are kept as tuples in a buffer of the worker and only turned into
+    # JSON once the net is done:
+    #   (phase, category, name, timestamp in ns, duration or key, args)
+    # Each worker is a process of the trace, so it gets a track of its own.
+    # `channels' are the names of the channels of the program.
+
+    def __init__(self, wid, channels):
+        self.wid = wid
+        self.channels = channels
+        self.events = []
+
+    def span(self, cat, name, start, args=None):
+        # Complete event from `start' until now.
+        now = perf_counter_ns()
+        self.events.append(('X', cat, name, start, now - start, args))
+
+    def instant(self, cat, name, args=None):
+        self.events.append(('i', cat, name, perf_counter_ns(), None, args))
+
+    def begin(self, cat, name, key, args=None):
+        # Async events are paired by category and key, they may overlap.
+        self.events.append(('b', cat, name, perf_counter_ns(), key, args))
+
+    def end(self, cat, name, key):
+        self.events.append(('e', cat, name, perf_counter_ns(), key, None))
+
+    def export(self):
+        yield {'ph': 'M', 'name': 'process_name', 'pid': self.wid, 'tid': 0,
+               'args': {'name': 'worker %d' % self.wid}}
+
+        for ph, cat, name, ts, extra, args in self.events:
+            event = {'ph': ph, 'cat': cat, 'name': name, 'ts': ts / 1000,
+                     'pid': self.wid, 'tid': 0}
+
+            if ph == 'X':
+                event['dur'] = extra / 1000
+            elif ph == 'i':
+                event['s'] = 't'
+            else:
+                event['id'] = str(extra)
+
+            if args is not None:
+                event['args'] = self.args(args)
+
+            yield event
+
+    def args(self, args):
+        args = dict(zip(args[0], args[1:]))
+
+        # Continuations have no channel.
+        if args.get('channel') is not None:
+            args['channel'] = self.channels[args['channel']]
+
+        return args
+
+    @staticmethod
+    def dump(path, traces):
+        events = [e for trace in traces for e in trace.export()]
+
+        # json.dumps runs the C encoder, json.dump does not.
+        with open(path, 'w') as f:
+            f.write(json.dumps({'traceEvents': events,
+                                'displayTimeUnit': 'ms'}))
+            f.write('\n')
@@ -0,0 +1,583 @@
+import hashlib
+import hmac
+import os
+import pickle
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing import AuthenticationError, Queue, resource_tracker, \
+    shared_memory
+from queue import Empty, SimpleQueue
+from struct import Struct
+
+__all__ = ['QueueTransport', 'LocalTransport', 'RingTransport', 'RingBuffer',
+           'TcpTransport', 'TcpEndpoint', 'transports', 'dumps', 'loads',
+           'authenticate']
+
+
+#------------------------------------------------------------------------------
+# Out-of-band buffers
+#
+# Large buffers, such as bytes contents of messages (see stream.Messages) and
+# NumPy arrays, are not pickled into the payload: they are copied into a
+# shared memory segment of their own, which the receiver copies them out of
+# and unlinks. Segments left over by a failed worker are unlinked by the
+# resource tracker of multiprocessing.
+
+# Buffers of at least this many bytes are passed out of band.
+LARGE_BUFFER = 1 << 19
+
+
+class OutOfBand:
+    # Payload pickled with its buffers in the segment `name', one after the
+    # other: layout = ((size, readonly), ...).
+
+    def __init__(self, name, layout, payload):
+        self.name = name
+        self.layout = layout
+        self.payload = payload
+
+
+def dumps(data):
+    buffers = []
+
+    def out_of_band(buf):
+        if buf.raw().nbytes < LARGE_BUFFER:
+            return True
+
+        buffers.append(buf.raw())
+        return False
+
+    payload = pickle.dumps(data, 5, buffer_callback=out_of_band)
+
+    if not buffers:
+        return payload
+
+    shm = shared_memory.SharedMemory(
+        create=True, size=sum(raw.nbytes for raw in buffers))
+
+    offset = 0
+
+    for raw in buffers:
+        shm.buf[offset:offset + raw.nbytes] = raw
+        offset += raw.nbytes
+
+    layout = tuple((raw.nbytes, raw.readonly) for raw in buffers)
+    shm.close()
+
+    return pickle.dumps(OutOfBand(shm.name, layout, payload),
+                        pickle.HIGHEST_PROTOCOL)
+
+
+def loads(payload):
+    data = pickle.loads(payload)
+
+    if type(data) is not OutOfBand:
+        return data
+
+    shm = shared_memory.SharedMemory(data.name)
+    buffers = []
+    offset = 0
+
+    # Read-only buffers are loaded as bytes, the others as bytearrays.
+    for size, readonly in data.layout:
+        view = shm.buf[offset:offset + size]
+        buffers.append(bytes(view) if readonly else bytearray(view))
+        view.release()
+        offset += size
+
+    shm.close()
+    shm.unlink()
+
+    return pickle.loads(data.payload, buffers=buffers)
+
+
+#------------------------------------------------------------------------------
+# multiprocessing.Queue
+
+class QueueTransport:
+    # A queue per worker, any worker may put into it. Data are pickled by the
+    # sender, see dumps.
+
+    def __init__(self, n_workers):
+        self.n_workers = n_workers
+        self.queues = [Queue() for i in range(n_workers)]
+
+        # Workers share the tracker of the segments of large buffers.
+        resource_tracker.ensure_running()
+
+    def endpoint(self, wid):
+        return QueueEndpoint(wid, self.queues)
+
+    def release(self):
+        pass
+
+
+class QueueEndpoint:
+
+    def __init__(self, wid, queues):
+        self.wid = wid
+        self.queues = queues
+
+    def put(self, wid, data):
+        self.queues[wid].put(dumps(data))
+
+    def get(self, block=True, timeout=None):
+        return loads(self.queues[self.wid].get(block, timeout))
+
+    def flush(self):
+        return True
+
+    def close(self, flush=False):
+        # Undelivered control messages must not block the exit, unless they
+        # are to be delivered before it: the feeder threads of the queues
+        # are then joined when the process exits.
+        if flush:
+            return
+
+        for q in self.queues:
+            q.cancel_join_thread()
+
+
+#------------------------------------------------------------------------------
+# In-process queues
+
+class LocalTransport(QueueTransport):
+    # Workers running as threads of one process exchange references, nothing
+    # is pickled.
+
+    def __init__(self, n_workers):
+        self.n_workers = n_workers
+        self.queues = [SimpleQueue() for i in range(n_workers)]
+
+    def endpoint(self, wid):
+        return LocalEndpoint(wid, self.queues)
+
+
+class LocalEndpoint(QueueEndpoint):
+
+    def put(self, wid, data):
+        self.queues[wid].put(data)
+
+    def get(self, block=True, timeout=None):
+        return self.queues[self.wid].get(block, timeout)
+
+    def close(self, flush=False):
+        pass
+
+
+#------------------------------------------------------------------------------
+# Shared memory rings
+
+_frame = Struct('<I')
+
+# Frame header: payload length, the high bit is set on all fragments of a
+# message but the last one.
+_MORE = 1 << 31
+
+
+class RingBuffer:
+    # Single-producer single-consumer byte ring in shared memory.
+    #
+    # The header holds two monotonic byte counters: `head' is only advanced by
+    # the producer after a whole frame is written, `tail' only by the consumer
+    # after a frame is read.
+
+    HEADER = 16
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.shm = shared_memory.SharedMemory(create=True,
+                                              size=self.HEADER + capacity)
+        self.buf = self.shm.buf
+        self.buf[:self.HEADER] = bytes(self.HEADER)
+
+        # Counters are aligned native words, each stored with a single access:
+        # Struct.pack_into clears its bytes first, so the peer could read a
+        # counter of 0 in between.
+        self.counters = self.buf[:self.HEADER].cast('Q')
+
+    def write(self, payload, flags=0):
+        head, tail = self.counters
+        n = _frame.size + len(payload)
+
+        if self.capacity - (head - tail) < n:
+            return False
+
+        pos = head % self.capacity
+        offset = self.HEADER + pos
+
+        if pos + n <= self.capacity:
+            _frame.pack_into(self.buf, offset, len(payload) | flags)
+            self.buf[offset + _frame.size:offset + n] = payload
+
+        else:
+            # Wrap around the end of the ring.
+            frame = _frame.pack(len(payload) | flags) + payload
+            first = self.capacity - pos
+
+            self.buf[offset:offset + first] = frame[:first]
+            self.buf[self.HEADER:self.HEADER + n - first] = frame[first:]
+
+        self.counters[0] = head + n
+        return True
+
+    def read(self):
+        head, tail = self.counters
+
+        if head == tail:
+            return None
+
+        pos = tail % self.capacity
+
+        if pos + _frame.size <= self.capacity:
+            size, = _frame.unpack_from(self.buf, self.HEADER + pos)
+        else:
+            size, = _frame.unpack(self._copy(tail, _frame.size))
+
+        payload = self._copy(tail + _frame.size, size & ~_MORE)
+
+        self.counters[1] = tail + _frame.size + len(payload)
+
+        return bool(size & _MORE), payload
+
+    def _copy(self, start, n):
+        pos = start % self.capacity
+        offset = self.HEADER + pos
+
+        if pos + n <= self.capacity:
+            return self.buf[offset:offset + n].tobytes()
+
+        first = self.capacity - pos
+        return (self.buf[offset:offset + first].tobytes() +
+                self.buf[self.HEADER:self.HEADER + n - first].tobytes())
+
+    def release(self):
+        self.counters.release()
+        del self.buf
+        self.shm.close()
+        self.shm.unlink()
+
+
+class RingTransport:
+    # A ring per ordered pair of workers: rings[src][dst].
+
+    def __init__(self, n_workers, capacity=1 << 20):
+        self.n_workers = n_workers
+        self.rings = [[RingBuffer(capacity) for dst in range(n_workers)]
+                      for src in range(n_workers)]
+
+    def endpoint(self, wid):
+        return RingEndpoint(wid, self.rings)
+
+    def release(self):
+        for row in self.rings:
+            for ring in row:
+                ring.release()
+
+
+class RingEndpoint:
+
+    # Sleep between polls of empty rings in a blocking get, doubled up to
+    # `max_backoff' while nothing arrives.
+    backoff = 0.00002
+    max_backoff = 0.001
+
+    def __init__(self, wid, rings):
+        self.wid = wid
+        self.outbox = rings[wid]
+        self.inbox = [row[wid] for row in rings]
+
+        # Fragments are limited so that a frame always fits an empty ring.
+        self.max_frame = self.outbox[0].capacity // 2 - _frame.size
+
+        # Fragments not yet written due to a full ring.
+        self.pending = [deque() for r in self.outbox]
+        self.fragments = [[] for r in self.inbox]
+
+        self.received = deque()
+
+    def put(self, wid, data):
+        payload = dumps(data)
+        pending = self.pending[wid]
+
+        if len(payload) <= self.max_frame:
+            if not pending and self.outbox[wid].write(payload):
+                return
+
+            pending.append((payload, 0))
+
+        else:
+            for i in range(0, len(payload), self.max_frame):
+                more = _MORE if i + self.max_frame < len(payload) else 0
+                pending.append((payload[i:i + self.max_frame], more))
+
+        self._flush(wid)
+
+    def _flush(self, wid):
+        pending = self.pending[wid]
+        ring = self.outbox[wid]
+
+        while pending and ring.write(*pending[0]):
+            pending.popleft()
+
+    def flush(self):
+        for wid, pending in enumerate(self.pending):
+            if pending:
+                self._flush(wid)
+
+        return not any(self.pending)
+
+    def _poll(self):
+        # Drain every inbound ring, sources are visited in turn.
+        for src, ring in enumerate(self.inbox):
+            fragments = self.fragments[src]
+            r = ring.read()
+
+            while r is not None:
+                more, payload = r
+
+                if more or fragments:
+                    fragments.append(payload)
+
+                    if more:
+                        r = ring.read()
+                        continue
+
+                    payload = b''.join(fragments)
+                    fragments.clear()
+
+                self.received.append(loads(payload))
+
+                r = ring.read()
+
+    def get(self, block=True, timeout=None):
+        deadline = None
+        backoff = self.backoff
+
+        while True:
+            self.flush()
+
+            if not self.received:
+                self._poll()
+
+            if self.received:
+                return self.received.popleft()
+
+            if not block:
+                raise Empty
+
+            now = time.monotonic()
+
+            if deadline is None:
+                deadline = now + timeout if timeout is not None else None
+
+            elif now >= deadline:
+                raise Empty
+
+            time.sleep(backoff)
+            backoff = min(2 * backoff, self.max_backoff)
+
+    def close(self, flush=False, timeout=1.0):
+        # Pending fragments are written as long as the peers drain their
+        # rings, up to `timeout'.
+        deadline = time.perf_counter() + timeout
+
+        while flush and not self.flush():
+            if time.perf_counter() >= deadline:
+                break
+
+            time.sleep(self.max_backoff)
+
+
+#------------------------------------------------------------------------------
+# TCP sockets
+
+def send_frame(sock, data):
+    # Length-prefixed pickle, returns the number of bytes sent.
+    payload = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_frame.pack(len(payload)) + payload)
+    return _frame.size + len(payload)
+
+
+def recv_frame(sock):
+    # The next frame and its size, None once the peer has closed.
+    header = _recv_exactly(sock, _frame.size)
+
+    if header is None:
+        return None
+
+    size, = _frame.unpack(header)
+    payload = _recv_exactly(sock, size)
+
+    if payload is None:
+        return None
+
+    return pickle.loads(payload), _frame.size + size
+
+
+def authenticate(sock, authkey, server, timeout=10.0):
+    # Both ends of a new connection prove that they know `authkey' before
+    # any frame is unpickled: each answers the random challenge of the other
+    # with its HMAC. The role is part of the digest, so a challenge cannot be
+    # answered by sending it back.
+    challenge = os.urandom(32)
+    roles = (b'server', b'client') if server else (b'client', b'server')
+
+    sock.settimeout(timeout)
+
+    try:
+        sock.sendall(challenge)
+        other = _recv_exactly(sock, len(challenge))
+
+        if other is not None:
+            sock.sendall(_digest(authkey, roles[0], other))
+            answer = _recv_exactly(sock, hashlib.sha256().digest_size)
+
+    except OSError:
+        other = None
+
+    if other is None or answer is None or \
+            not hmac.compare_digest(answer,
+                                    _digest(authkey, roles[1], challenge)):
+        raise AuthenticationError('Peer failed to authenticate')
+
+    sock.settimeout(None)
+
+
+def _digest(authkey, role, challenge):
+    return hmac.new(authkey, role + challenge, hashlib.sha256).digest()
+
+
+def _recv_exactly(sock, n):
+    buf = bytearray()
+
+    while len(buf) < n:
+        try:
+            chunk = sock.recv(n - len(buf))
+        except OSError:
+            return None
+
+        if not chunk:
+            return None
+
+        buf += chunk
+
+    return bytes(buf)
+
+
+class TcpTransport:
+    # Sockets of a single worker to its peers, see distributed: peers[wid] is
+    # connected to worker `wid', None for the worker itself.
+
+    def __init__(self, wid, peers):
+        self.n_workers = len(peers)
+        self.local = TcpEndpoint(wid, peers)
+
+    def endpoint(self, wid):
+        assert wid == self.local.wid
+        return self.local
+
+    def release(self):
+        pass
+
+
+class TcpEndpoint:
+    # Endpoint of a worker connected to each peer by a socket, see
+    # distributed. A thread per socket reads frames into the inbox.
+    #
+    # Traffic is counted per link: frames, messages and bytes sent to each
+    # peer and received from it.
+
+    # Control messages may find a peer gone once the net is done.
+    control = ('steal', 'nosteal', 'stop')
+
+    def __init__(self, wid, peers):
+        self.wid = wid
+        self.peers = peers
+        self.inbox = SimpleQueue()
+
+        self.sent = [[0, 0, 0] for p in peers]
+        self.received = [[0, 0, 0] for p in peers]
+        self.started = time.perf_counter()
+        self.stopped = None
+
+        self.readers = [threading.Thread(target=self.read, args=(src, sock),
+                                         daemon=True)
+                        for src, sock in enumerate(peers) if sock is not None]
+
+        for r in self.readers:
+            r.start()
+
+    def read(self, src, sock):
+        while True:
+            r = recv_frame(sock)
+
+            if r is None:
+                return
+
+            data, size = r
+            self.count(self.received[src], data, size)
+            self.inbox.put(data)
+
+    @staticmethod
+    def count(link, data, size):
+        link[0] += 1
+        if data[0] == 'batch':
+            link[1] += len(data[1]) + len(data[2])
+        else:
+            link[1] += 1
+        link[2] += size
+
+    def put(self, wid, data):
+        if wid == self.wid:
+            self.inbox.put(data)
+            return
+
+        try:
+            size = send_frame(self.peers[wid], data)
+        except OSError:
+            if data[0] in self.control:
+                return
+            raise
+
+        self.count(self.sent[wid], data, size)
+
+    def get(self, block=True, timeout=None):
+        return self.inbox.get(block, timeout)
+
+    def flush(self):
+        return True
+
+    def close(self, flush=False):
+        self.stopped = time.perf_counter()
+
+        for sock in self.peers:
+            if sock is None:
+                continue
+
+            try:
+                # Wakes up the reader of the socket.
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+            sock.close()
+
+    def links(self):
+        # Traffic per peer and the time the endpoint was open.
+        return {
+            'sent': {wid: link for wid, link in enumerate(self.sent)
+                     if wid != self.wid},
+            'received': {wid: link for wid, link in enumerate(self.received)
+                         if wid != self.wid},
+            'seconds': (self.stopped or time.perf_counter()) - self.started,
+        }
+
+
+transports = {
+    'queue': QueueTransport,
+    'local': LocalTransport,
+    'ring': RingTransport,
+}
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+# Async boxes waiting on I/O on the asyncio backend, with and without a limit
+# on the number of coroutines in flight.
+#
+#   python3 benchmarks/aio.py [n_elements]
+
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+def measure(inp, limits):
+    runner = akr.Runner(nets.expand(nets.Fetch), {'in': inp},
+                        backend='asyncio', limits=limits)
+
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    inp = [n // 10] * 10
+
+    print('sequential %8.3fs' % (0.01 * n))
+
+    for limit in (None, 10, 100):
+        elapsed = measure(inp, {'Fetch': limit} if limit else None)
+        print('limit %-4s %8.3fs %10.0f el/s' %
+              (limit, elapsed, n / elapsed))
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+# Process against thread backend on small and larger workloads.
+#
+#   python3 benchmarks/backend.py [n_workers]
+
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+def measure(cfg, inp, n_workers, backend):
+    runner = akr.Runner(cfg, {'in': inp}, n_workers, backend=backend)
+
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+
+    workloads = [
+        ('factorial 4x10', nets.factorial(), [10] * 4),
+        ('factorial 64x100', nets.factorial(), [100] * 64),
+        ('expand 8x2000', nets.expand(), [2000] * 8),
+    ]
+
+    for name, cfg, inp in workloads:
+        for backend in ('processes', 'threads'):
+            elapsed = measure(cfg, inp, n_workers, backend)
+            print('%-17s %-9s %8.4fs %10.0f el/s' %
+                  (name, backend, elapsed, sum(inp) / elapsed))
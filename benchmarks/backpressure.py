@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# Peak memory of a fast inductor feeding a slow reductor on another worker,
+# with and without bounded queues.
+#
+#   python3 benchmarks/backpressure.py [capacity] [window]
+
+import resource
+import subprocess
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+@akr.reductor(True)
+def Slow(a, b):
+    for i in range(3000):
+        pass
+    return a + b
+
+
+def slow():
+    # <in|Gen|terms> .. <terms|Slow|out>
+    nodes = [
+        ('bb_0', {'stmts': [(nets.Gen, ('in',), ('terms',)),
+                            (Slow, ('terms',), ('out',)),
+                            (nets.__output__, ('out',), ())]}),
+    ]
+
+    cfg = akr.DiGraph()
+    cfg.add_nodes_from(nodes)
+    cfg.entry = {'in': 'bb_0'}
+
+    return cfg
+
+
+def measure(n, capacity, window):
+    # The long list is produced by worker 0 and folded by its owner, worker
+    # 1, so one worker produces faster than the other consumes.
+    runner = akr.Runner(slow(), {'in': [1, 1, n]}, 2, 'partition',
+                        placement='scatter', capacity=capacity, window=window)
+
+    start = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - start
+
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return elapsed, rss
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--one']:
+        n, capacity, window = (None if a == 'None' else int(a)
+                               for a in sys.argv[2:])
+        print('%f %d' % measure(n, capacity, window))
+        sys.exit()
+
+    capacity = sys.argv[1] if len(sys.argv) > 1 else '1000'
+    window = sys.argv[2] if len(sys.argv) > 2 else '1000'
+
+    for limits in (('None', 'None'), (capacity, window)):
+        for n in (10000, 30000, 100000):
+            # A fresh process for each run, peak RSS only grows.
+            out = subprocess.check_output([sys.executable, __file__, '--one',
+                                           str(n)] + list(limits))
+            elapsed, rss = out.split()
+
+            print('capacity %-5s window %-5s %7d el %8.3fs %8.1f MB' %
+                  (limits + (n, float(elapsed), int(rss) / 1024)))
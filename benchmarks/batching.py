@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+# Outbound batch sizes on a net where inductors emit long lists that are
+# partitioned across workers and then mapped.
+#
+#   python3 benchmarks/batching.py [list_length] [n_workers]
+
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+def measure(batch_size, inp, n_workers, transport='queue'):
+    runner = akr.Runner(nets.expand(), {'in': inp}, n_workers, 'partition',
+                        transport, batch_size=batch_size)
+
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    inp = [length] * 8 * n_workers
+
+    for transport in ('queue', 'ring'):
+        for batch_size in (1, 16, 64, 256):
+            elapsed = measure(batch_size, inp, n_workers, transport)
+            print('%-6s batch %4d %8.3fs %10.0f el/s' %
+                  (transport, batch_size, elapsed, sum(inp) / elapsed))
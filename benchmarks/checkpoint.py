@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+# Cost of checkpoints: run times without them and with checkpoints taken every
+# 1s and 0.1s, then a run that fails halfway through and is resumed from its
+# latest checkpoint.
+#
+#   python3 benchmarks/checkpoint.py [n_workers] [repeat]
+
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+# Calls of Flaky left before it fails, None to never fail.
+budget = None
+
+
+@akr.transductor
+def Flaky(n):
+    global budget
+
+    if budget is not None:
+        budget -= 1
+
+        if budget < 0:
+            raise RuntimeError('Flaky has failed')
+
+    time.sleep(0.0001)
+    return (n * n, )
+
+
+def run(cfg, inp, n_workers, backend=None, **kwargs):
+    nets.collect()
+
+    start = time.perf_counter()
+    akr.Runner(cfg, inp, n_workers, backend=backend, **kwargs).run()
+    elapsed = time.perf_counter() - start
+
+    return elapsed, nets.drain()
+
+
+def recover(n_workers, directory):
+    # Fail after half of the calls, then resume. Results emitted after the
+    # last checkpoint are emitted again, so they are told apart by their ids.
+    global budget
+
+    cfg = nets.expand(Flaky)
+    inp = {'in': [1000] * 20}
+    backend = 'sequential' if n_workers == 1 else 'threads'
+
+    budget = 10000
+    nets.collect()
+
+    try:
+        akr.Runner(cfg, inp, n_workers, backend=backend, checkpoint=directory,
+                   checkpoint_interval=0.1).run()
+    except RuntimeError:
+        pass
+
+    failed = nets.drain()
+
+    budget = None
+    elapsed, resumed = run(cfg, inp, n_workers, backend, checkpoint=directory,
+                           checkpoint_interval=0.1, resume=True)
+
+    results = {i: c for t, c, i in failed + resumed}
+    assert sorted(results.values()) == \
+        sorted(n * n for n in range(1, 1001) for i in range(20))
+
+    print('failed after %d results, resumed with %d more in %.4fs, '
+          '%d emitted twice' % (len(failed), len(resumed), elapsed,
+                                len(failed) + len(resumed) - len(results)))
+
+
+if __name__ == '__main__':
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    workloads = [
+        ('factorial 64x1000', nets.factorial(), {'in': [1000] * 64}),
+        ('morph 64x10000', nets.morph(),
+         {'in': [{'lst': list(range(10000))}] * 64}),
+        ('merger 16x1000', nets.merger(), {'a': [1000] * 16,
+                                           'b': [1000] * 16}),
+    ]
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        for name, cfg, inp in workloads:
+            base = min(run(cfg, inp, n_workers)[0] for i in range(repeat))
+            print('%-18s %-14s %8.4fs' % (name, 'off', base))
+
+            for interval in (1.0, 0.1):
+                elapsed = min(run(cfg, inp, n_workers, checkpoint=directory,
+                                  checkpoint_interval=interval)[0]
+                              for i in range(repeat))
+
+                print('%-18s every %-5.1fs   %8.4fs %+7.1f%%' %
+                      (name, interval, elapsed, 100 * (elapsed / base - 1)))
+
+        recover(n_workers, directory)
+
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+# Compare two results of benchmarks/suite.py case by case: best times and
+# their ratio, cases that changed by more than the threshold are marked.
+#
+#   python3 benchmarks/compare.py old.json new.json [threshold]
+
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    old, new = load(sys.argv[1]), load(sys.argv[2])
+    threshold = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+
+    print('old: %s' % (old['meta']['revision'] or sys.argv[1]))
+    print('new: %s' % (new['meta']['revision'] or sys.argv[2]))
+    print('%-48s %10s %10s %8s' % ('', 'old', 'new', 'ratio'))
+
+    for name, r in new['cases'].items():
+        if name not in old['cases']:
+            print('%-48s %10s %9.6fs' % (name, '-', r['min']))
+            continue
+
+        before = old['cases'][name]['min']
+        ratio = r['min'] / before
+
+        if ratio > 1 + threshold:
+            mark = 'slower'
+        elif ratio < 1 - threshold:
+            mark = 'faster'
+        else:
+            mark = ''
+
+        print('%-48s %9.6fs %9.6fs %8.3f %s' %
+              (name, before, r['min'], ratio, mark))
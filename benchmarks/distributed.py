@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+# Distributed runs on localhost: workers are started with `python -m akr' and
+# connect to the coordinator over TCP. Prints the run time against worker
+# processes of a single Runner, and the throughput of each link.
+#
+#   python3 benchmarks/distributed.py [n_workers] [repeat]
+
+import os
+import subprocess
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+
+def spawn(address, authkey, n_workers):
+    # Workers import the boxes from this directory and akr from the parent.
+    env = dict(os.environ, AKR_AUTHKEY=authkey.hex(),
+               PYTHONPATH=os.pathsep.join([here, os.path.dirname(here),
+                                           os.environ.get('PYTHONPATH', '')]))
+
+    return subprocess.Popen([sys.executable, '-m', 'akr', '-n',
+                             str(n_workers), '%s:%d' % address],
+                            cwd=here, env=env)
+
+
+def distributed(cfg, inp, n_workers):
+    coordinator = akr.Coordinator(cfg, inp, n_workers)
+    workers = spawn(coordinator.address, coordinator.authkey, n_workers)
+
+    start = time.perf_counter()
+    coordinator.run()
+    elapsed = time.perf_counter() - start
+
+    workers.wait()
+    return elapsed, coordinator
+
+
+def local(cfg, inp, n_workers):
+    nets.collect()
+
+    start = time.perf_counter()
+    akr.Runner(cfg, inp, n_workers).run()
+    elapsed = time.perf_counter() - start
+
+    return elapsed, len(nets.drain())
+
+
+if __name__ == '__main__':
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    workloads = [
+        ('factorial 64x1000', nets.factorial(), {'in': [1000] * 64}, 64),
+        ('morph 64x10000', nets.morph(),
+         {'in': [{'lst': list(range(10000))}] * 64}, 64),
+        ('merger 16x1000', nets.merger(), {'a': [1000] * 16,
+                                           'b': [1000] * 16}, 32000),
+    ]
+
+    for name, cfg, inp, expected in workloads:
+        elapsed, n = min(local(cfg, inp, n_workers) for i in range(repeat))
+        assert n == expected
+
+        print('%-18s processes   %8.4fs' % (name, elapsed))
+
+        elapsed, coordinator = min((distributed(cfg, inp, n_workers)
+                                    for i in range(repeat)),
+                                   key=lambda r: r[0])
+
+        print('%-18s tcp         %8.4fs' % (name, elapsed))
+
+        for (src, dst), (msgs, size) in coordinator.throughput().items():
+            link = coordinator.links[src, dst]
+            print('    %d -> %d  %8d msgs %10d bytes  %10.0f msgs/s  '
+                  '%8.3f MB/s' % (src, dst, link['messages'], link['bytes'],
+                                  msgs, size / 1e6))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# Cost of message ids per hop: Message.id_eye on ports 0 and 1 and
+# Message.id_up at depths 1 to 4, against the MD5 ids they have replaced.
+#
+#   python3 benchmarks/ids.py [n]
+
+import hashlib
+import sys
+import time
+from functools import partial
+from itertools import chain
+
+sys.path[0:0] = ['.', '..']
+
+from akr.stream import Message
+
+
+# MD5 ids: every list id is hashed on every hop, new lists are named after
+# the bytes of the whole id.
+
+def md5i(n, p):
+    h = hashlib.md5((n + p).to_bytes(16, 'little')).digest()
+    return int.from_bytes(h, 'little')
+
+
+def md5s(s, p):
+    h = hashlib.md5(s + p.to_bytes(16, 'little')).digest()
+    return int.from_bytes(h, 'little')
+
+
+def md5_eye(mid, port):
+    ids = map(partial(md5i, port), mid[::2])
+    return tuple(chain(*zip(ids, mid[1::2])))
+
+
+def md5_up(mid, port, index):
+    ls = b''.join(n.to_bytes(16, 'little') for n in mid)
+    return md5_eye(mid, port) + (md5s(ls, port), index)
+
+
+def measure(f, n):
+    start = time.perf_counter()
+
+    for i in range(n):
+        f()
+
+    return 1e9 * (time.perf_counter() - start) / n
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print('%-14s %5s %10s %10s %8s' % ('', 'depth', 'md5', 'hash', 'speedup'))
+
+    for depth in range(1, 5):
+        # Ids as found in a run, with list ids of the old and new kind.
+        mid = tuple(range(2 * depth))
+        old = md5_up(mid, 0, 3)[2:]
+        new = Message(None, mid).id_up(0, 3)[2:]
+        m = Message(None, new)
+
+        cases = [
+            ('id_eye port 0', lambda: md5_eye(old, 0), lambda: m.id_eye(0)),
+            ('id_eye port 1', lambda: md5_eye(old, 1), lambda: m.id_eye(1)),
+            ('id_up port 0', lambda: md5_up(old, 0, 5),
+             lambda: m.id_up(0, 5)),
+        ]
+
+        for name, before, after in cases:
+            t0, t1 = measure(before, n), measure(after, n)
+
+            print('%-14s %5d %8.0fns %8.0fns %7.1fx' %
+                  (name, depth, t0, t1, t0 / t1))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+# Time to first output, run time and worker peak RSS of a single long
+# induction.
+#
+#   python3 benchmarks/induction.py [length ...]
+
+import sys
+import time
+import resource
+from multiprocessing import Process, SimpleQueue
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+def run(length, n_workers, report):
+    nets.collect()
+    runner = akr.Runner(nets.expand(), {'in': [length]}, n_workers)
+
+    start = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - start
+
+    first = min(t for t, content, mid in nets.drain()) - start
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    report.put((first, elapsed, rss))
+
+
+def measure(length, n_workers=1):
+    # Each run in a fresh process so that peak RSS is not shared.
+    report = SimpleQueue()
+
+    p = Process(target=run, args=(length, n_workers, report))
+    p.start()
+    p.join()
+
+    return report.get()
+
+
+if __name__ == '__main__':
+    lengths = [int(a) for a in sys.argv[1:]] or [1000, 4000, 16000]
+
+    for length in lengths:
+        first, elapsed, rss = measure(length)
+        print('%7d elements  first output %.3fs  total %.3fs  '
+              'peak rss %6d KiB' % (length, first, elapsed, rss))
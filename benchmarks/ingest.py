@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# Time to first output and peak memory against the length of a streamed
+# input.
+#
+#   python3 benchmarks/ingest.py [backend]
+
+import resource
+import subprocess
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+first = None
+
+
+@akr.output
+def __output__(channel, msg):
+    global first
+    if first is None:
+        first = time.perf_counter()
+
+
+def measure(n, backend):
+    cfg = nets.expand()
+    cfg.node['bb_0']['stmts'][-1] = (__output__, ('out',), ())
+
+    # A generator, no input message exists before the net starts.
+    runner = akr.Runner(cfg, {'in': (3 for i in range(n))}, 2,
+                        backend=backend)
+
+    start = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - start
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return first - start, elapsed, rss
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--one']:
+        print('%f %f %d' % measure(int(sys.argv[2]), sys.argv[3]))
+        sys.exit()
+
+    # Output is timed in the calling process.
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'threads'
+
+    for n in (10000, 100000, 300000):
+        # A fresh process for each run, peak RSS only grows.
+        out = subprocess.check_output([sys.executable, __file__, '--one',
+                                       str(n), backend])
+        to_first, elapsed, rss = out.split()
+
+        print('%8d inputs first output %8.4fs total %8.3fs %8.1f MB' %
+              (n, float(to_first), float(elapsed), int(rss) / 1024))
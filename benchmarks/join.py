@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# Size of the join table and peak memory against the length of the stream,
+# for a vertex joining a message with a delayed copy of itself.
+#
+#   python3 benchmarks/join.py [backend]
+
+import resource
+import subprocess
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+@akr.transductor
+def Split(n):
+    return (n, n)
+
+
+@akr.transductor
+def Delay(n):
+    return (n, )
+
+
+@akr.transductor
+def Add(a, b):
+    return (a + b, )
+
+
+def split_join():
+    # <in|Split|a,b> .. (<a> || <b|Delay|c>) .. <a,c|Add|out>
+    nodes = [
+        ('bb_0', {'stmts': [(Split, ('in',), ('a', 'b'))]}),
+        ('bb_1', {'stmts': [(Delay, ('b',), ('c',))]}),
+        ('bb_2', {'stmts': [(Add, ('a', 'c'), ('out',)),
+                            (nets.__output__, ('out',), ())]}),
+    ]
+
+    edges = [
+        ('bb_0', 'bb_2', {'chn': {'a'}}),
+        ('bb_0', 'bb_1', {'chn': {'b'}}),
+        ('bb_1', 'bb_2', {'chn': {'c'}}),
+    ]
+
+    cfg = akr.DiGraph()
+    cfg.add_nodes_from(nodes)
+    cfg.add_edges_from(edges)
+    cfg.entry = {'in': 'bb_0'}
+
+    return cfg
+
+
+def measure(n, backend):
+    runner = akr.Runner(split_join(), {'in': range(n)}, 2, backend=backend)
+    worker = runner.workers[0]
+
+    start = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - start
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elapsed, len(worker.joins), rss
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--one']:
+        print('%f %d %d' % measure(int(sys.argv[2]), sys.argv[3]))
+        sys.exit()
+
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'sequential'
+
+    for n in (10000, 100000, 300000):
+        # A fresh process for each run, peak RSS only grows.
+        out = subprocess.check_output([sys.executable, __file__, '--one',
+                                       str(n), backend])
+        elapsed, left, rss = out.split()
+
+        print('%7d messages %8.3fs %8.0f msg/s %3d left %8.1f MB' %
+              (n, float(elapsed), n / float(elapsed), int(left),
+               int(rss) / 1024))
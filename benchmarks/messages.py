@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# Memory of messages: a message with a __dict__, as before, against one with
+# __slots__ and against the columns of stream.Messages, then the size and the
+# round trip time of batches for another worker, as a list of items and as
+# columns.
+#
+#   python3 benchmarks/messages.py [n]
+
+import gc
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path[0:0] = ['.', '..']
+
+from akr.runtime import Worker, batched
+from akr.stream import Message, Messages
+
+
+class DictMessage:
+    # Message without __slots__.
+
+    def __init__(self, content, id, bracket=None):
+        self.content = content
+        self.id = id
+
+        self.bracket = bracket
+        self.channel = None
+        self.pc = None
+
+
+def ids(n, depth):
+    # Ids of elements of lists of 64, as made by Message.id_up.
+    return [Message(None, (0, j // 64) * (depth - 1)).id_up(0, j % 64)
+            for j in range(n)]
+
+
+def located(cls, n, depth, content=None):
+    msgs = [cls(content, mid) for mid in ids(n, depth)]
+
+    for m in msgs:
+        m.channel = 1
+        m.pc = (0, 1)
+
+    return msgs
+
+
+def allocated(make):
+    # Bytes and blocks held by the result of make().
+    gc.collect()
+    tracemalloc.start()
+
+    before = tracemalloc.take_snapshot()
+    result = make()
+    after = tracemalloc.take_snapshot()
+
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    return (sum(s.size_diff for s in stats),
+            sum(s.count_diff for s in stats))
+
+
+def timed(f, repeat=200, rounds=5):
+    # Best time of a call over a few rounds, in us.
+    best = None
+
+    for j in range(rounds):
+        start = time.perf_counter()
+
+        for i in range(repeat):
+            f()
+
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return 1e6 * best / repeat
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print('%d messages with their ids, contents not counted:' % n)
+
+    for depth in (1, 2):
+        cases = [
+            ('__dict__', lambda: located(DictMessage, n, depth)),
+            ('__slots__', lambda: located(Message, n, depth)),
+            ('Messages', lambda: Messages(m.dump() for m in
+                                          located(Message, n, depth))),
+        ]
+
+        for name, make in cases:
+            size, blocks = allocated(make)
+            print('  depth %d %-10s %7.1f bytes %5.2f blocks per message' %
+                  (depth, name, size / n, blocks / n))
+
+    print('batches for another worker, pickled and loaded into messages:')
+
+    for depth in (1, 2, 3):
+        for size in (16, 64):
+            items = [m.dump() for m in located(Message, size, depth, 'x')]
+
+            listed = ('batch', items)
+            packed = batched(items)
+
+            p0 = pickle.dumps(listed, pickle.HIGHEST_PROTOCOL)
+            p1 = pickle.dumps(packed, pickle.HIGHEST_PROTOCOL)
+
+            t0 = timed(lambda: list(map(Worker.load, pickle.loads(
+                pickle.dumps(listed, pickle.HIGHEST_PROTOCOL))[1])))
+            t1 = timed(lambda: list(pickle.loads(
+                pickle.dumps(batched(items), pickle.HIGHEST_PROTOCOL))[1]))
+
+            print('  depth %d, %2d messages: %6d -> %6d bytes, '
+                  '%6.1fus -> %6.1fus' %
+                  (depth, size, len(p0), len(p1), t0, t1))
@@ -0,0 +1,168 @@
+# Small nets assembled directly in the form emitted by `python -m akc'.
+
+import asyncio
+import time
+from multiprocessing import SimpleQueue
+from threading import Thread
+
+import akr
+
+# Completion records (time, content, id) collected from the output box.
+results = None
+_records = None
+_reader = None
+
+
+def _read(queue, records):
+    # Keep the pipe from filling up while workers are running.
+    for r in iter(queue.get, None):
+        records.append(r)
+
+
+def collect():
+    global results, _records, _reader
+    results = SimpleQueue()
+    _records = []
+    _reader = Thread(target=_read, args=(results, _records), daemon=True)
+    _reader.start()
+
+
+def drain():
+    results.put(None)
+    _reader.join()
+    return _records
+
+
+@akr.inductor
+def Gen(n):
+    return (n, ), (n - 1 if n > 1 else None)
+
+
+@akr.transductor
+def Square(n):
+    return (n * n, )
+
+
+@akr.transductor
+async def Fetch(n):
+    # Stands for a request to a remote service.
+    await asyncio.sleep(0.01)
+    return (n, )
+
+
+@akr.reductor(True)
+def Reduce(a, b):
+    return a * b
+
+
+@akr.reductor(True, associative=True)
+def ReduceAssociative(a, b):
+    return a * b
+
+
+@akr.reductor(False)
+def ReduceUnordered(a, b):
+    return a * b
+
+
+@akr.inductor
+def Split(msg, size=16):
+    # Chunks of the list of a record, the rest of it is the continuation.
+    lst = msg['lst']
+    rest = {'lst': lst[size:]} if len(lst) > size else None
+    return ({'lst': lst[:size]}, ), rest
+
+
+@akr.transductor
+def Sum(msg):
+    return (sum(msg['lst']), )
+
+
+@akr.reductor(False, associative=True)
+def Add(a, b):
+    return a + b
+
+
+@akr.output
+def __output__(channel, msg):
+    if results is not None:
+        results.put((time.perf_counter(), ) + msg)
+
+
+def factorial(ordered=True, associative=False):
+    # <in|Gen|terms> .. <terms|Reduce|out>
+    if not ordered:
+        reduce = ReduceUnordered
+    else:
+        reduce = ReduceAssociative if associative else Reduce
+
+    nodes = [
+        ('bb_0', {'stmts': [(Gen, ('in',), ('terms',)),
+                            (reduce, ('terms',), ('out',)),
+                            (__output__, ('out',), ())]}),
+    ]
+
+    cfg = akr.DiGraph()
+    cfg.add_nodes_from(nodes)
+    cfg.entry = {'in': 'bb_0'}
+    cfg.exit = {'out': 'bb_0'}
+
+    return cfg
+
+
+def expand(box=Square, gen=Gen):
+    # <in|Gen|terms> .. <terms|Square|out>
+    nodes = [
+        ('bb_0', {'stmts': [(gen, ('in',), ('terms',)),
+                            (box, ('terms',), ('out',)),
+                            (__output__, ('out',), ())]}),
+    ]
+
+    cfg = akr.DiGraph()
+    cfg.add_nodes_from(nodes)
+    cfg.entry = {'in': 'bb_0'}
+    cfg.exit = {'out': 'bb_0'}
+
+    return cfg
+
+
+def morph():
+    # Split, map and reduce of {'lst': [..]} records, see tests/morph:
+    # <in|Split|chunks> .. <chunks|Sum|sums> .. <sums|Add|out>
+    nodes = [
+        ('bb_0', {'stmts': [(Split, ('in',), ('chunks',)),
+                            (Sum, ('chunks',), ('sums',)),
+                            (Add, ('sums',), ('out',)),
+                            (__output__, ('out',), ())]}),
+    ]
+
+    cfg = akr.DiGraph()
+    cfg.add_nodes_from(nodes)
+    cfg.entry = {'in': 'bb_0'}
+    cfg.exit = {'out': 'bb_0'}
+
+    return cfg
+
+
+def merger(box=Square):
+    # Two streams merged into one, see akc/mergers:
+    # (<a|Gen|c> || <b|Gen|c>) .. <c|Square|out>
+    nodes = [
+        ('bb_a', {'stmts': [(Gen, ('a',), ('c',))]}),
+        ('bb_b', {'stmts': [(Gen, ('b',), ('c',))]}),
+        ('bb_c', {'stmts': [(box, ('c',), ('out',)),
+                            (__output__, ('out',), ())]}),
+    ]
+
+    edges = [
+        ('bb_a', 'bb_c', {'chn': {'c'}}),
+        ('bb_b', 'bb_c', {'chn': {'c'}}),
+    ]
+
+    cfg = akr.DiGraph()
+    cfg.add_nodes_from(nodes)
+    cfg.add_edges_from(edges)
+    cfg.entry = {'a': 'bb_a', 'b': 'bb_b'}
+    cfg.exit = {'out': 'bb_c'}
+
+    return cfg
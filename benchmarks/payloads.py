@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+# Large payloads between worker processes: an inductor makes bytes contents
+# of a given size, which are scattered over the workers, with buffers passed
+# out of band through shared memory and pickled into the payload as before.
+#
+#   python3 benchmarks/payloads.py [n_workers] [transport] [repeat]
+
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import akr.transport
+import nets
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@akr.inductor
+def Blobs(msg):
+    # `count' contents of `size' bytes, of the given kind.
+    size, count, kind = msg['size'], msg['count'], msg['kind']
+
+    if kind == 'numpy':
+        blob = numpy.zeros(size, dtype=numpy.uint8)
+    else:
+        blob = bytes(size)
+
+    rest = dict(msg, count=count - 1) if count > 1 else None
+    return (blob, ), rest
+
+
+@akr.transductor
+def Length(blob):
+    return (len(blob), )
+
+
+def run(inp, n_workers, transport):
+    nets.collect()
+
+    start = time.perf_counter()
+    akr.Runner(nets.expand(Length, gen=Blobs), inp, n_workers, 'partition',
+               transport, placement='scatter').run()
+    elapsed = time.perf_counter() - start
+
+    assert sum(c for t, c, i in nets.drain()) == \
+        sum(m['size'] * m['count'] for m in inp['in'])
+
+    return elapsed
+
+
+if __name__ == '__main__':
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    transport = sys.argv[2] if len(sys.argv) > 2 else 'queue'
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    kinds = ['bytes'] if numpy is None else ['bytes', 'numpy']
+    total = 256 << 20
+
+    for kind in kinds:
+        for size in (4 << 10, 512 << 10, 1 << 20, 8 << 20):
+            inp = {'in': [{'size': size, 'count': total // size // 4,
+                           'kind': kind}] * 4}
+
+            times = []
+
+            for large in (1 << 62, akr.transport.LARGE_BUFFER):
+                # Workers are forked, they see the threshold of this process.
+                default, akr.transport.LARGE_BUFFER = \
+                    akr.transport.LARGE_BUFFER, large
+
+                try:
+                    times.append(min(run(inp, n_workers, transport)
+                                     for i in range(repeat)))
+                finally:
+                    akr.transport.LARGE_BUFFER = default
+
+            print('%-5s %8d bytes  in band %8.4fs  out of band %8.4fs  '
+                  '%6.0f -> %6.0f MB/s' %
+                  (kind, size, times[0], times[1], total / times[0] / 1e6,
+                   total / times[1] / 1e6))
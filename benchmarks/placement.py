@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+# Messages moved between workers and throughput with lists scattered over
+# workers against lists kept on their home worker.
+#
+#   python3 benchmarks/placement.py [n_workers]
+
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+def measure(cfg, inp, n_workers, scheduler, placement):
+    runner = akr.Runner(cfg, {'in': inp}, n_workers, scheduler,
+                        placement=placement)
+
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start, sum(runner.moved)
+
+
+if __name__ == '__main__':
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+    workloads = [
+        ('factorial 64x100', nets.factorial(), [100] * 64),
+        ('expand 8x2000', nets.expand(), [2000] * 8),
+    ]
+
+    for name, cfg, inp in workloads:
+        for scheduler in ('partition', 'stealing'):
+            for placement in ('scatter', 'locality'):
+                elapsed, moved = measure(cfg, inp, n_workers, scheduler,
+                                         placement)
+                print('%-17s %-9s %-8s %8.3fs %10.0f el/s %8d moved' %
+                      (name, scheduler, placement, elapsed,
+                       sum(inp) / elapsed, moved))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+# Cost of profiling: run time of a net with the counters off and on, and the
+# report of the last run.
+#
+#   python3 benchmarks/profiler.py [backend] [repeat]
+
+import json
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+def measure(cfg, inp, backend, profile):
+    nets.collect()
+    runner = akr.Runner(cfg, {'in': inp}, 2, backend=backend, profile=profile)
+
+    start = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - start
+
+    nets.drain()
+    return elapsed, runner.profile
+
+
+if __name__ == '__main__':
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'processes'
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    workloads = [
+        ('factorial 64x100', nets.factorial(), [100] * 64),
+        ('expand 8x2000', nets.expand(), [2000] * 8),
+    ]
+
+    for name, cfg, inp in workloads:
+        off = min(measure(cfg, inp, backend, False)[0]
+                  for i in range(repeat))
+        on = min(measure(cfg, inp, backend, True)[0] for i in range(repeat))
+
+        print('%-17s %-10s off %8.4fs  on %8.4fs  %+6.1f%%' %
+              (name, backend, off, on, 100 * (on - off) / off))
+
+    print(json.dumps(measure(cfg, inp, backend, True)[1].report(), indent=2))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+# Size and load time of the control flow graph shipped to a worker: the
+# networkx graph against the lowered program.
+#
+#   python3 benchmarks/program.py [repeat]
+
+import pickle
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+import routing
+
+
+def measure(obj, repeat):
+    data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        pickle.loads(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+    return len(data), (time.perf_counter() - start) / repeat
+
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    graphs = [
+        ('factorial', nets.factorial()),
+        ('fanout 64x8', routing.fanout(64)),
+    ]
+
+    for name, cfg in graphs:
+        for kind, obj in (('graph', cfg), ('program', cfg.lower())):
+            size, elapsed = measure(obj, repeat)
+            print('%-12s %-8s %8d bytes %8.1fus' %
+                  (name, kind, size, 1e6 * elapsed))
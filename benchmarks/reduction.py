@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+# Ordered, ordered associative and unordered reductions over concurrent lists
+# against the number of workers.
+#
+#   python3 benchmarks/reduction.py [n_lists] [list_length]
+
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+def measure(inp, n_workers, ordered=True, associative=False):
+    runner = akr.Runner(nets.factorial(ordered, associative), {'in': inp},
+                        n_workers)
+
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    n_lists = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    inp = [length] * n_lists
+
+    kinds = [
+        ('ordered', True, False),
+        ('associative', True, True),
+        ('unordered', False, False),
+    ]
+
+    for name, ordered, associative in kinds:
+        for n_workers in (1, 2, 4):
+            elapsed = measure(inp, n_workers, ordered, associative)
+            print('%-11s %d workers %8.3fs %10.0f el/s' %
+                  (name, n_workers, elapsed, sum(inp) / elapsed))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+# Routing of messages between basic blocks with many outgoing channels.
+#
+#   python3 benchmarks/routing.py [n_channels] [n_elements]
+
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+@akr.transductor
+def Pass(n):
+    return (n, )
+
+
+def fanout(n_channels, depth=8):
+    # A chain of basic blocks, each with `n_channels' outgoing edges of which
+    # the last one leads on.
+    last = 'c%d' % (n_channels - 1)
+
+    nodes = [('bb_%d' % d, {'stmts': [(Pass, (last if d else 'in',),
+                                       (last,))]})
+             for d in range(depth)]
+    nodes.append(('bb_exit', {'stmts': [(nets.__output__, (last,), ())]}))
+    nodes.append(('bb_sink', {'stmts': []}))
+
+    edges = []
+    for d in range(depth):
+        for c in range(n_channels - 1):
+            edges.append(('bb_%d' % d, 'bb_sink', {'chn': {'c%d' % c}}))
+
+        dst = 'bb_%d' % (d + 1) if d + 1 < depth else 'bb_exit'
+        edges.append(('bb_%d' % d, dst, {'chn': {last}}))
+
+    cfg = akr.DiGraph()
+    cfg.add_nodes_from(nodes)
+    cfg.add_edges_from(edges)
+    cfg.entry = {'in': 'bb_0'}
+    cfg.exit = {last: 'bb_exit'}
+
+    return cfg
+
+
+if __name__ == '__main__':
+    n_channels = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    cfg = fanout(n_channels)
+    runner = akr.Runner(cfg, {'in': list(range(n))}, 1)
+
+    program = runner.workers[0].program
+    last = program.channel_ids['c%d' % (n_channels - 1)]
+    start = time.perf_counter()
+    for i in range(n):
+        program.next_pc((0, 0), last)
+    elapsed = time.perf_counter() - start
+    print('next_pc %8.3fs %8.2fus/call' % (elapsed, 1e6 * elapsed / n))
+
+    start = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - start
+    print('net     %8.3fs %8.2fus/msg' % (elapsed, 1e6 * elapsed / n / 8))
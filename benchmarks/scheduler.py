@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+# Work-stealing against round-robin partitioning on skewed factorial lists.
+#
+#   python3 benchmarks/scheduler.py [n_lists] [n_workers]
+
+import sys
+import time
+from random import Random
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+def skewed_input(n_lists, n_workers, seed=0):
+    # Heavy lists land on the same worker under round-robin placement.
+    rnd = Random(seed)
+    return [rnd.randint(100, 400) if i % n_workers == 0 else rnd.randint(1, 10)
+            for i in range(n_lists)]
+
+
+def measure(scheduler, inp, n_workers):
+    nets.collect()
+
+    runner = akr.Runner(nets.factorial(), {'in': inp}, n_workers, scheduler)
+
+    start = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - start
+
+    latency = sorted(t - start for t, content, mid in nets.drain())
+    assert len(latency) == len(inp)
+
+    pct = lambda p: latency[min(len(latency) - 1, int(p * len(latency)))]
+
+    return {
+        'scheduler': scheduler,
+        'elapsed': elapsed,
+        'elements_per_sec': sum(inp) / elapsed,
+        'p50': pct(0.50),
+        'p99': pct(0.99),
+        'max': latency[-1],
+    }
+
+
+if __name__ == '__main__':
+    n_lists = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    n_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    inp = skewed_input(n_lists, n_workers)
+
+    for scheduler in ('partition', 'stealing'):
+        r = measure(scheduler, inp, n_workers)
+        print('%(scheduler)-10s %(elapsed)8.3fs %(elements_per_sec)10.0f el/s '
+              'p50 %(p50).3fs p99 %(p99).3fs max %(max).3fs' % r)
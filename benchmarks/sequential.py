@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+# Per-message overhead of a single worker: in-process interpreter against a
+# worker process and a worker thread.
+#
+#   python3 benchmarks/sequential.py [repeat]
+
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+def measure(cfg, inp, backend):
+    start = time.perf_counter()
+    akr.Runner(cfg, {'in': inp}, 1, backend=backend).run()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    workloads = [
+        ('factorial 1x10', nets.factorial(), [10]),
+        ('factorial 64x100', nets.factorial(), [100] * 64),
+        ('expand 8x2000', nets.expand(), [2000] * 8),
+    ]
+
+    for name, cfg, inp in workloads:
+        for backend in ('processes', 'threads', 'sequential'):
+            elapsed = min(measure(cfg, inp, backend) for i in range(repeat))
+            print('%-17s %-10s %8.4fs %8.2fus/msg' %
+                  (name, backend, elapsed, 2e6 * elapsed / sum(inp)))
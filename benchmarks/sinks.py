@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+# Writing every output record with a call per message against the buffered
+# sinks.
+#
+#   python3 benchmarks/sinks.py [n_workers]
+
+import json
+import os
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sinks.out')
+
+
+@akr.output
+def __output__(channel, msg):
+    # A record per write, as printing per message does.
+    with open(PATH, 'a') as f:
+        f.write(json.dumps({'channel': channel, 'content': msg[0],
+                            'id': msg[1]}) + '\n')
+
+
+def measure(output, n_workers):
+    cfg = nets.expand()
+    cfg.node['bb_0']['stmts'][-1] = (output, ('out',), ())
+
+    runner = akr.Runner(cfg, {'in': [2000] * 16}, n_workers)
+
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+
+    outputs = [
+        ('per message', __output__),
+        ('jsonl', akr.JsonLines(PATH)),
+        ('csv', akr.Csv(PATH)),
+        ('pickle', akr.PickleStream(PATH)),
+        ('memory', akr.Memory()),
+    ]
+
+    for name, output in outputs:
+        elapsed = measure(output, n_workers)
+        print('%-12s %8.3fs %10.0f records/s' %
+              (name, elapsed, 32000 / elapsed))
+
+        if os.path.exists(PATH):
+            os.remove(PATH)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+# Benchmark suite of the compile and run pipelines: the synchroniser and net
+# compilers, reading of input streams, message ids and whole runs of the
+# factorial, morph and merger nets. Results are written as JSON, compare two
+# of them with benchmarks/compare.py.
+#
+#   python3 benchmarks/suite.py [-o results.json] [-r repeat] [-k pattern] [-q]
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from functools import partial
+from datetime import datetime, timezone
+from optparse import OptionParser
+
+sys.path[0:0] = ['.', '..']
+
+import akc.boxes
+import aksync.compiler
+import akr
+from akc.net.compiler import compile as compile_net
+from akr.stream import Stream, Message
+
+import nets
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+usage = "usage: %prog [options]"
+opts = OptionParser(usage=usage)
+
+opts.add_option('-o', '--output', type='string', dest='output',
+                metavar='OUTPUT', default=None)
+opts.add_option('-r', '--repeat', type='int', dest='repeat',
+                metavar='REPEAT', default=5)
+opts.add_option('-k', type='string', dest='pattern', metavar='PATTERN',
+                default='', help='only cases whose name contains PATTERN')
+opts.add_option('-q', '--quick', action='store_true', dest='quick',
+                default=False, help='smallest sizes only')
+
+
+#------------------------------------------------------------------------------
+# Cases
+#
+# A case is (name, items, prepare, run): run(prepare()) is timed, `items' is
+# the number of units of work in a run, so that times per item compare across
+# sizes.
+
+def sync_cases(quick):
+    # Sources from aksync/tests that the compiler accepts, and a file of many
+    # copies of zip2 for scale.
+    files = ['zip2.sync', 'join.sync', 'syntax/006-states.sync',
+             'syntax/007-scopes.sync']
+
+    for name in files:
+        with open(os.path.join(root, 'aksync', 'tests', name)) as f:
+            code = f.read()
+
+        yield ('aksync.compile[%s]' % name, 1, lambda code=code: code,
+               aksync.compiler.compile)
+
+    with open(os.path.join(root, 'aksync', 'tests', 'zip2.sync')) as f:
+        zip2 = f.read()
+
+    for n in (8, ) if quick else (8, 64):
+        code = ''.join(zip2.replace('zip2', 'zip2_%d' % i) for i in range(n))
+
+        yield ('aksync.compile[zip2 x%d]' % n, n, lambda code=code: code,
+               aksync.compiler.compile)
+
+
+@akc.boxes.transductor(1)
+def Map(msg):
+    return (msg, )
+
+
+@akc.boxes.inductor(1)
+def Induce(msg):
+    return (msg, ), None
+
+
+@akc.boxes.reductor(akc.boxes.MONADIC, akc.boxes.UNORDERED, 1)
+def Fold(a, b):
+    return (a, )
+
+
+def serial_net(n):
+    # <in|Induce|c0> .. <c0|Map|c1> .. .. <cn|Fold|out>
+    wiring = ' .. '.join('<c%d|Map|c%d>' % (i, i + 1) for i in range(n))
+    return ('net Serial (in | out)\nconnect\n  <in|Induce|c0> .. %s .. '
+            '<c%d|Fold|out>\nend\n' % (wiring, n))
+
+
+def parallel_net(n):
+    # <in|Induce|a> .. (<a|Map|b> || ..) .. <b|Fold|out>
+    wiring = ' || '.join('<a|Map|b>' for i in range(n))
+    return ('net Parallel (in | out)\nconnect\n  <in|Induce|a> .. (%s) .. '
+            '<b|Fold|out>\nend\n' % wiring)
+
+
+def net_cases(quick):
+    boxes = {'Map': Map(), 'Induce': Induce(), 'Fold': Fold()}
+
+    def compiled(code):
+        graph, used_boxes, used_syncs = compile_net(code, boxes, {})
+        return graph
+
+    def convert(graph):
+        graph.convert_to_ir()
+
+    for n in (8, ) if quick else (8, 64):
+        for kind, net in (('serial', serial_net), ('parallel', parallel_net)):
+            code = net(n)
+
+            yield ('akc.compile[%s %d]' % (kind, n), n,
+                   lambda code=code: code, compiled)
+
+            yield ('akc.convert_to_ir[%s %d]' % (kind, n), n,
+                   lambda code=code: compiled(code), convert)
+
+
+def stream_cases(quick):
+    # Flat and nested inputs of n messages.
+    for n in (1000, ) if quick else (1000, 100000):
+        flat = list(range(n))
+        nested = [list(range(100)) for i in range(n // 100)]
+
+        yield ('Stream.read[flat %d]' % n, n, Stream, lambda s: s.read(flat))
+        yield ('Stream.read[nested %d]' % n, n, Stream,
+               lambda s: s.read(nested))
+
+
+def message_cases(quick):
+    # Ids of messages at depth 1 and 3 of nested lists.
+    n = 10000
+
+    for depth in (1, 3):
+        msg = Message(0, tuple(range(2 * depth)))
+
+        def up(msg, msg_id=msg.id):
+            for i in range(n):
+                msg.id = msg_id
+                msg.id_up(0, i)
+
+        def eye(msg, msg_id=msg.id, port=0):
+            for i in range(n):
+                msg.id = msg_id
+                msg.id_eye(port)
+
+        yield ('Message.id_up[depth %d]' % depth, n, lambda msg=msg: msg, up)
+        yield ('Message.id_eye[depth %d]' % depth, n, lambda msg=msg: msg,
+               eye)
+        yield ('Message.id_eye[depth %d, port 1]' % depth, n,
+               lambda msg=msg: msg, partial(eye, port=1))
+
+
+def run_cases(quick):
+    # Whole runs of k inputs of size n: the input, the number of elements of
+    # the lists it makes and the number of results expected.
+    workloads = [
+        ('factorial', nets.factorial, lambda k, n: {'in': [n] * k},
+         lambda k, n: k * n, lambda k, n: k),
+        ('morph', nets.morph,
+         lambda k, n: {'in': [{'lst': list(range(n))}] * k},
+         lambda k, n: k * n, lambda k, n: k),
+        ('merger', nets.merger, lambda k, n: {'a': [n] * k, 'b': [n] * k},
+         lambda k, n: 2 * k * n, lambda k, n: 2 * k * n),
+    ]
+
+    sizes = [(16, 100)] if quick else [(16, 100), (64, 100), (64, 1000)]
+    workers = (1, 2) if quick else (1, 2, 4)
+
+    for name, net, inputs, items, outputs in workloads:
+        cfg = net()
+
+        for k, n in sizes:
+            for n_workers in workers:
+
+                def run(__input__, cfg=cfg, n_workers=n_workers,
+                        expected=outputs(k, n)):
+                    nets.collect()
+                    akr.Runner(cfg, __input__, n_workers).run()
+                    assert len(nets.drain()) == expected
+
+                yield ('Runner.run[%s %dx%d, %d workers]' %
+                       (name, k, n, n_workers), items(k, n),
+                       lambda k=k, n=n, inputs=inputs: inputs(k, n), run)
+
+
+suites = [sync_cases, net_cases, stream_cases, message_cases, run_cases]
+
+
+#------------------------------------------------------------------------------
+
+def measure(items, prepare, run, repeat):
+    times = []
+
+    for i in range(repeat):
+        arg = prepare()
+
+        start = time.perf_counter()
+        run(arg)
+        times.append(time.perf_counter() - start)
+
+    return {
+        'items': items,
+        'times': times,
+        'min': min(times),
+        'median': statistics.median(times),
+        'us_per_item': 1e6 * min(times) / items,
+    }
+
+
+def revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root,
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+
+    (options, args) = opts.parse_args()
+
+    results = {
+        'meta': {
+            'revision': revision(),
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'repeat': options.repeat,
+        },
+        'cases': {},
+    }
+
+    for suite in suites:
+        for name, items, prepare, run in suite(options.quick):
+            if options.pattern not in name:
+                continue
+
+            r = measure(items, prepare, run, options.repeat)
+            results['cases'][name] = r
+
+            print('%-48s %10.6fs %12.3fus/item' %
+                  (name, r['min'], r['us_per_item']), file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+
+    if options.output is None:
+        print(output)
+    else:
+        with open(options.output, 'w') as f:
+            f.write(output + '\n')
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+# Cost of tracing: run time of a net with the trace off and on, and how much
+# of the latter goes to writing the trace file after the workers are done.
+# The trace of the last run is left at the given path, open it in
+# chrome://tracing or Perfetto.
+#
+#   python3 benchmarks/tracer.py [path] [backend] [repeat]
+
+import sys
+import time
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+import nets
+
+
+def measure(cfg, inp, backend, trace):
+    nets.collect()
+    runner = akr.Runner(cfg, {'in': inp}, 2, backend=backend, trace=trace)
+
+    start = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - start
+
+    nets.drain()
+
+    if trace is None:
+        return elapsed, 0
+
+    start = time.perf_counter()
+    akr.Trace.dump(trace, runner.traces)
+    return elapsed, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else 'trace.json'
+    backend = sys.argv[2] if len(sys.argv) > 2 else 'processes'
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    workloads = [
+        ('factorial 64x100', nets.factorial(), [100] * 64),
+        ('expand 8x2000', nets.expand(), [2000] * 8),
+    ]
+
+    for name, cfg, inp in workloads:
+        off = min(measure(cfg, inp, backend, None)[0] for i in range(repeat))
+        on, write = min(measure(cfg, inp, backend, path)
+                        for i in range(repeat))
+
+        print('%-17s %-10s off %8.4fs  on %8.4fs  write %8.4fs  %+6.1f%%' %
+              (name, backend, off, on, write,
+               100 * (on - write - off) / off))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+# Queue against shared memory ring transport between two workers.
+#
+#   python3 benchmarks/transport.py [n_messages]
+
+import sys
+import time
+from multiprocessing import Process, SimpleQueue
+
+sys.path[0:0] = ['.', '..']
+
+import akr
+from akr.transport import transports
+import nets
+
+
+def produce(endpoint, n, cpu):
+    start = time.process_time()
+
+    for i in range(n):
+        endpoint.put(1, ('msg', i, (17, 0, 42, i), None, 'terms', ('bb_0', 1)))
+
+    endpoint.put(1, ('stop', ))
+
+    # Keep writing until the consumer took everything.
+    while not endpoint.flush():
+        time.sleep(0.0001)
+
+    cpu.put(time.process_time() - start)
+
+
+def consume(endpoint, cpu):
+    start = time.process_time()
+
+    while endpoint.get()[0] != 'stop':
+        pass
+
+    cpu.put(time.process_time() - start)
+
+
+def measure(name, n):
+    transport = transports[name](2)
+    cpu = SimpleQueue()
+
+    ps = [Process(target=produce, args=(transport.endpoint(0), n, cpu)),
+          Process(target=consume, args=(transport.endpoint(1), cpu))]
+
+    start = time.perf_counter()
+
+    for p in ps:
+        p.start()
+    for p in ps:
+        p.join()
+
+    elapsed = time.perf_counter() - start
+    transport.release()
+
+    return {
+        'transport': name,
+        'msgs_per_sec': n / elapsed,
+        'cpu_us_per_msg': 1e6 * (cpu.get() + cpu.get()) / n,
+    }
+
+
+def measure_net(name, inp):
+    runner = akr.Runner(nets.factorial(), {'in': inp}, 4, 'partition', name)
+
+    start = time.perf_counter()
+    runner.run()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    for name in transports:
+        r = measure(name, n)
+        net = measure_net(name, [50] * 32)
+        print('%-6s %10.0f msg/s %6.1f us cpu/msg  factorial net %.3fs' %
+              (name, r['msgs_per_sec'], r['cpu_us_per_msg'], net))
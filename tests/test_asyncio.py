@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import asyncio
+import unittest
+from collections import Counter
+import akr
+from akr.program import Program
+
+# Calls of Probe in flight and their maximum, per vertex.
+inflight = Counter()
+peak = Counter()
+
+
+@akr.transductor
+async def Probe(x):
+    # Inputs of the first vertex are ints, of the second tuples.
+    vertex = 'b' if isinstance(x, tuple) else 'a'
+
+    inflight[vertex] += 1
+    peak[vertex] = max(peak[vertex], inflight[vertex])
+
+    await asyncio.sleep(0.001)
+    inflight[vertex] -= 1
+
+    return (('b', x), )
+
+
+def probes():
+    # <in|Probe|a> .. <a|Probe|out>, the same box at two vertices.
+    sink = akr.Memory()
+    blocks = [[(Probe, (0, ), (1, )), (Probe, (1, ), (2, )),
+               (sink, (2, ), ())]]
+
+    return Program(blocks, [{}], ['in', 'a', 'out'], {'in': 0}), sink
+
+
+class TestAsyncio(unittest.TestCase):
+
+    def run_net(self, limits):
+        inflight.clear()
+        peak.clear()
+
+        program, sink = probes()
+        akr.Runner(program, {'in': list(range(40))}, backend='asyncio',
+                   limits=limits).run()
+
+        return sorted(content for channel, content, id in sink.records)
+
+    def test_results(self):
+        out = self.run_net(None)
+
+        self.assertEqual(out, [('b', ('b', n)) for n in range(40)])
+        self.assertGreater(peak['a'], 3)
+
+    def test_vertex_limits(self):
+        # Limits of vertices are apart even though they run the same box.
+        out = self.run_net({(0, 0): 3, (0, 1): 1})
+
+        self.assertEqual(len(out), 40)
+        self.assertEqual(peak, {'a': 3, 'b': 1})
+
+    def test_box_limits(self):
+        # A limit by name applies to each vertex of the box.
+        out = self.run_net({'Probe': 2})
+
+        self.assertEqual(len(out), 40)
+        self.assertEqual(peak, {'a': 2, 'b': 2})
+
+    def test_unsupported(self):
+        program, sink = probes()
+
+        for option in ({'n_workers': 2}, {'scheduler': 'partition'},
+                       {'transport': 'ring'}, {'placement': 'scatter'},
+                       {'capacity': 100}, {'window': 100},
+                       {'checkpoint': '/nonexistent'}):
+            with self.assertRaises(ValueError):
+                akr.Runner(program, {'in': [1]}, backend='asyncio', **option)
+
+        with self.assertRaises(ValueError):
+            akr.Runner(program, {'in': [1]}, backend='threads',
+                       limits={'Probe': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
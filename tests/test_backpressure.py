@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import unittest
+import akr
+from akr.program import Program
+
+# Backlog of the net being run and the peaks of its queues, sampled by
+# Square.
+backlog = None
+peaks = {'queued': 0, 'inflight': 0}
+
+
+@akr.inductor
+def Gen(n):
+    return (n, ), (n - 1 if n > 1 else None)
+
+
+@akr.transductor
+def Square(n):
+    peaks['queued'] = max(peaks['queued'], *backlog.queued)
+    peaks['inflight'] = max(peaks['inflight'],
+                            *map(backlog.inflight, range(backlog.n_workers)))
+
+    return (n * n, )
+
+
+def squares():
+    # <in|Gen|a> .. <a|Square|out>
+    sink = akr.Memory()
+    blocks = [[(Gen, (0, ), (1, )), (Square, (1, ), (2, )),
+               (sink, (2, ), ())]]
+
+    return Program(blocks, [{}], ['in', 'a', 'out'], {'in': 0}), sink
+
+
+class TestBackpressure(unittest.TestCase):
+
+    def run_net(self, scheduler, capacity, window):
+        global backlog
+
+        program, sink = squares()
+        runner = akr.Runner(program, {'in': [300] * 6}, 2,
+                            scheduler=scheduler, backend='threads',
+                            capacity=capacity, window=window)
+
+        backlog = runner.workers[0].backlog
+        peaks.update(queued=0, inflight=0)
+
+        runner.run()
+
+        return sorted(content for channel, content, id in sink.records)
+
+    def test_bounded(self):
+        # Inductions are parked and resumed: the net completes with queues
+        # within the bounds.
+        expected = sorted([n * n for n in range(1, 301)] * 6)
+
+        for scheduler in ('stealing', 'partition'):
+            for capacity, window in ((8, None), (None, 4), (4, 2)):
+                out = self.run_net(scheduler, capacity, window)
+
+                self.assertEqual(out, expected)
+
+                if capacity is not None:
+                    self.assertLessEqual(peaks['queued'], capacity)
+
+                if window is not None:
+                    self.assertLessEqual(peaks['inflight'], window)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import os
+import shutil
+import tempfile
+import unittest
+import akr
+from akr.checkpoint import Store, latest
+from akr.program import Program
+
+
+@akr.inductor
+def Gen(n):
+    return (n, ), (n - 1 if n > 1 else None)
+
+
+@akr.transductor
+def Square(n):
+    return (n * n, )
+
+
+def squares():
+    # <in|Gen|a> .. <a|Square|out>
+    sink = akr.Memory()
+    blocks = [[(Gen, (0, ), (1, )), (Square, (1, ), (2, )),
+               (sink, (2, ), ())]]
+
+    return Program(blocks, [{}], ['in', 'a', 'out'], {'in': 0}), sink
+
+
+class TestStore(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = Store(self.path, 0, 1)
+        self.store.start()
+
+    def tearDown(self):
+        self.store.stop()
+        shutil.rmtree(self.path)
+
+    def test_taken_on_save(self):
+        # Parts are saved as they were when save returned, not as they are
+        # once the writer gets to them.
+        acc = [1, 2]
+        self.store.save(1, {'sessions': {'a': acc}, 'position': 1})
+
+        acc.append(3)
+        self.store.stop()
+
+        self.assertEqual(latest(self.path),
+                         (1, [{'sessions': {'a': [1, 2]}, 'position': 1}]))
+
+    def test_unchanged(self):
+        # A part that has not changed is not written again, older epochs are
+        # pruned.
+        joins = {(0, 0): ([1], [])}
+
+        for epoch in range(1, 4):
+            self.store.save(epoch, {'joins': joins, 'position': epoch})
+
+        self.store.stop()
+
+        names = os.listdir(os.path.join(self.path, 'worker-0'))
+
+        self.assertEqual(sorted(n for n in names if n.endswith('.json')),
+                         ['3.json'])
+        self.assertEqual(len(names), 3)
+        self.assertEqual(latest(self.path),
+                         (3, [{'joins': joins, 'position': 3}]))
+
+
+
+class TestRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_checkpointed(self):
+        # Checkpoints do not change the results, a finished net is resumed
+        # from its last one.
+        expected = sorted([n * n for n in range(1, 501)] * 4)
+
+        for backend, n_workers in (('sequential', 1), ('threads', 2),
+                                   ('processes', 2)):
+            path = os.path.join(self.path, backend)
+
+            for resume in (False, True):
+                program, sink = squares()
+                akr.Runner(program, {'in': [500] * 4}, n_workers,
+                           backend=backend, checkpoint=path,
+                           checkpoint_interval=0.001, resume=resume).run()
+
+                out = sorted(c for channel, c, id in sink.records)
+
+                if not resume:
+                    self.assertEqual(out, expected)
+                    self.assertIsNotNone(latest(path))
+                else:
+                    self.assertTrue(set(out) <= set(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import socket
+import unittest
+from multiprocessing import SimpleQueue
+import akr
+from akr.program import Program
+from akr.transport import send_frame
+
+# Outputs of the workers, which are processes of their own.
+results = SimpleQueue()
+
+# Frames of intruders that were unpickled.
+intrusions = []
+
+
+def intrude():
+    intrusions.append(None)
+
+
+@akr.inductor
+def Gen(n):
+    return (n, ), (n - 1 if n > 1 else None)
+
+
+@akr.transductor
+def Square(n):
+    return (n * n, )
+
+
+@akr.output
+def Collect(channel, msg):
+    results.put(msg[0])
+
+
+def squares():
+    # <in|Gen|a> .. <a|Square|out>
+    blocks = [[(Gen, (0, ), (1, )), (Square, (1, ), (2, )),
+               (Collect, (2, ), ())]]
+
+    return Program(blocks, [{}], ['in', 'a', 'out'], {'in': 0})
+
+
+class TestCoordinator(unittest.TestCase):
+
+    def run_net(self, coordinator, n):
+        coordinator.run(local=True)
+        return sorted(results.get() for i in range(n))
+
+    def test_local(self):
+        coordinator = akr.Coordinator(squares(), {'in': [10] * 20}, 3)
+        out = self.run_net(coordinator, 200)
+
+        self.assertEqual(out, sorted([n * n for n in range(1, 11)] * 20))
+        self.assertTrue(results.empty())
+
+        # Every worker has a link to each other one.
+        links = coordinator.links
+        self.assertEqual(sorted(links), [(src, dst) for src in range(3)
+                                         for dst in range(3) if src != dst])
+
+        for link, (messages, size) in coordinator.throughput().items():
+            r = links[link]
+
+            self.assertAlmostEqual(messages, r['messages'] / r['seconds'])
+            self.assertAlmostEqual(size, r['bytes'] / r['seconds'])
+
+        self.assertGreater(sum(r['messages'] for r in links.values()), 0)
+
+    def test_unauthenticated(self):
+        # A client without the key is dropped before anything it sends is
+        # unpickled, the workers are not disturbed.
+        coordinator = akr.Coordinator(squares(), {'in': [5] * 4}, 2)
+
+        class Payload:
+            def __reduce__(self):
+                return intrude, ()
+
+        # Connected before the workers are forked: a thread of this process
+        # could hold the import lock of their interpreter.
+        sock = socket.create_connection(coordinator.address)
+        send_frame(sock, Payload())
+        sock.shutdown(socket.SHUT_WR)
+
+        out = self.run_net(coordinator, 20)
+        sock.close()
+
+        self.assertEqual(out, sorted([n * n for n in range(1, 6)] * 4))
+        self.assertEqual(intrusions, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
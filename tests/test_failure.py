@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import unittest
+import akr
+from akr.program import Program
+
+
+@akr.transductor
+def Fail(n):
+    raise ValueError('Fail has failed')
+
+
+def failing():
+    # <in|Fail|out>
+    sink = akr.Memory()
+    blocks = [[(Fail, (0, ), (1, )), (sink, (1, ), ())]]
+
+    return Program(blocks, [{}], ['in', 'out'], {'in': 0})
+
+
+class TestFailure(unittest.TestCase):
+
+    def test_processes(self):
+        # A failed worker stops its peers and the run raises instead of
+        # waiting for them. The stop is lost now and then if the worker
+        # exits before it is delivered, hence the repeats.
+        for transport in ('queue', 'ring'):
+            for i in range(10):
+                runner = akr.Runner(failing(), {'in': list(range(5))}, 2,
+                                    backend='processes', transport=transport)
+
+                with self.assertRaises(RuntimeError):
+                    runner.run()
+
+    def test_threads(self):
+        runner = akr.Runner(failing(), {'in': list(range(5))}, 2,
+                            backend='threads')
+
+        with self.assertRaises(ValueError):
+            runner.run()
+
+
+if __name__ == '__main__':
+    unittest.main()
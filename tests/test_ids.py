@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import os
+import subprocess
+import unittest
+from akr.stream import *
+
+
+def tree(ids, depth, width, ports):
+    # Ids of the elements of lists induced from `ids' on every port, down to
+    # the given depth.
+    for i in range(depth):
+        ids = [Message(None, mid).id_up(port, index)
+               for mid in ids for port in ports for index in range(width)]
+
+    return ids
+
+
+class TestIds(unittest.TestCase):
+
+    def test_unique(self):
+        # Messages of 100 inputs split into lists of lists on 3 ports.
+        inputs = [m.id for m in Stream().read(list(range(100)))]
+        ids = tree(inputs, 2, 20, (0, 1, 2))
+
+        self.assertEqual(len(ids), 100 * 60 * 60)
+        self.assertEqual(len(set(ids)), len(ids))
+
+        # A list per message and port at the innermost level.
+        self.assertEqual(len({mid[-2] for mid in ids}), 100 * 20 * 3 * 3)
+
+    def test_ports(self):
+        # A message leaving by different ports gets different ids, and so
+        # do the lists it is nested in.
+        ids = tree([(0, 0)], 3, 10, (0, ))
+
+        for mid in ids:
+            m = Message(None, mid)
+            eyes = [m.id_eye(port) for port in range(4)]
+
+            self.assertEqual(len(set(eyes)), 4)
+
+            for i in range(0, len(mid), 2):
+                self.assertEqual(len({eye[i] for eye in eyes}), 4)
+
+            self.assertEqual(eyes[0], mid)
+
+    def test_lists(self):
+        # Elements of a list share its id, which goes when the list is
+        # reduced.
+        m = Message(None, (0, 7, 3, 2))
+
+        for port in (0, 1):
+            elements = [m.id_up(port, index) for index in range(10)]
+
+            self.assertEqual(len({mid[:-1] for mid in elements}), 1)
+            self.assertEqual([mid[-1] for mid in elements], list(range(10)))
+
+            e = Message(None, elements[-1])
+            self.assertEqual(e.id_down(0), m.id_eye(port))
+
+    def test_stable(self):
+        # Workers are processes, possibly on other hosts: ids must not
+        # depend on the interpreter instance.
+        code = ('from akr.stream import Message\n'
+                'print(Message(None, (0, 7, 3, 2)).id_up(1, 5))')
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root, PYTHONHASHSEED='1')
+
+        out = subprocess.run([sys.executable, '-c', code], env=env,
+                             capture_output=True, text=True, check=True)
+
+        self.assertEqual(out.stdout.strip(),
+                         str(Message(None, (0, 7, 3, 2)).id_up(1, 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import unittest
+import akr
+from akr.program import Program
+
+
+@akr.transductor
+def Pair(a, b):
+    return ((a, b), )
+
+
+@akr.transductor
+def Fork(n):
+    return (n, n)
+
+
+@akr.transductor
+def Inc(n):
+    return (n + 1, )
+
+
+@akr.inductor
+def Range(a, b):
+    return (a, ), ((a + 1, b) if a < b else None)
+
+
+@akr.reductor(True)
+def Add(a, b):
+    return a + b
+
+
+def entry(box=Pair):
+    # <a,b|Pair|out>
+    sink = akr.Memory()
+    blocks = [[(box, (0, 1), (2, )), (sink, (2, ), ())]]
+
+    return Program(blocks, [{}], ['a', 'b', 'out'], {'a': 0, 'b': 0}), sink
+
+
+def split():
+    # <in|Fork|x,y> .. (<x> || <y|Inc|z>) .. <x,z|Pair|out>
+    sink = akr.Memory()
+    blocks = [
+        [(Fork, (0, ), (1, 2))],
+        [(Inc, (2, ), (3, ))],
+        [(Pair, (1, 3), (4, )), (sink, (4, ), ())],
+    ]
+    routes = [{1: 2, 2: 1}, {3: 2}, {}]
+
+    return Program(blocks, routes, ['in', 'x', 'y', 'z', 'out'],
+                   {'in': 0}), sink
+
+
+class TestJoin(unittest.TestCase):
+
+    backends = [('sequential', 1), ('threads', 2), ('processes', 2)]
+
+    def run_net(self, program, sink, __input__, backend, n_workers):
+        akr.Runner(program, __input__, n_workers, backend=backend).run()
+        return sorted(content for channel, content, id in sink.records)
+
+    def test_entry(self):
+        # Messages of entry channels are matched by their position.
+        for backend, n_workers in self.backends:
+            program, sink = entry()
+            out = self.run_net(program, sink,
+                               {'a': [1, 2, 3], 'b': [10, 20, 30]},
+                               backend, n_workers)
+
+            self.assertEqual(out, [(1, 10), (2, 20), (3, 30)])
+
+    def test_split(self):
+        # Outputs of a box are joined again after taking different paths.
+        for backend, n_workers in self.backends:
+            program, sink = split()
+            out = self.run_net(program, sink, {'in': list(range(50))},
+                               backend, n_workers)
+
+            self.assertEqual(out, [(n, n + 1) for n in range(50)])
+
+    def test_inductor(self):
+        # Continuations of a joined inductor are the arguments of its next
+        # step.
+        for backend, n_workers in self.backends:
+            program, sink = entry(Range)
+            out = self.run_net(program, sink, {'a': [1, 5], 'b': [3, 5]},
+                               backend, n_workers)
+
+            self.assertEqual(out, [1, 2, 3, 5])
+
+    def test_unmatched(self):
+        program, sink = entry()
+
+        with self.assertRaises(RuntimeError):
+            akr.Runner(program, {'a': [1, 2, 3], 'b': [10, 20]}, 1).run()
+
+    def test_reductor(self):
+        program, sink = entry(Add)
+
+        with self.assertRaises(ValueError):
+            akr.Runner(program, {'a': [1], 'b': [10]}, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import random
+import unittest
+from akr.runtime import Partial
+
+
+def concat(channel, left, right):
+    # Associative but not commutative.
+    return left + right
+
+
+def ranges(text, cuts):
+    # Ranges of the elements of `text' between the given cuts:
+    # (start, end, folded elements).
+    bounds = [0] + sorted(cuts) + [len(text)]
+    return [(start, end, text[start:end])
+            for start, end in zip(bounds, bounds[1:])]
+
+
+class TestPartial(unittest.TestCase):
+
+    def test_out_of_order(self):
+        p = Partial((0, 0), True)
+
+        for start, end, acc in [(3, 4, 'd'), (0, 1, 'a'), (5, 6, 'f'),
+                                (1, 3, 'bc'), (4, 5, 'e')]:
+            self.assertFalse(p.complete)
+            p.add(concat, start, end, acc)
+
+        p.last = (6, None, None)
+
+        self.assertTrue(p.complete)
+        self.assertEqual(p.result, 'abcdef')
+
+    def test_merge(self):
+        # Ranges split over workers in any order are combined up a tree of
+        # partials, as by Worker.combine.
+        text = 'abcdefghijklmnopqrstuvwxyz' * 4
+        rng = random.Random(17)
+
+        for i in range(100):
+            parts = ranges(text, rng.sample(range(1, len(text)), 30))
+            rng.shuffle(parts)
+
+            partials = [Partial((0, 0), True) for w in range(5)]
+
+            for start, end, acc in parts:
+                rng.choice(partials).add(concat, start, end, acc)
+
+            partials[rng.randrange(5)].last = (len(text), None, None)
+
+            while len(partials) > 1:
+                other = partials.pop(rng.randrange(len(partials)))
+                rng.choice(partials).merge(concat, other)
+
+            self.assertTrue(partials[0].complete)
+            self.assertEqual(partials[0].result, text)
+
+    def test_unordered(self):
+        # Everything is folded into a single range, completion is counted.
+        p = Partial((0, 0), False)
+
+        for index in (4, 0, 2, 1):
+            p.add(lambda c, a, b: a + b, index, index + 1, 1)
+
+        p.last = (5, None, None)
+        self.assertFalse(p.complete)
+
+        p.add(lambda c, a, b: a + b, 3, 4, 1)
+
+        self.assertTrue(p.complete)
+        self.assertEqual(p.result, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import unittest
+import akr
+from akr.program import Program
+
+
+@akr.transductor
+def Inc(n):
+    return (n + 1, )
+
+
+@akr.output
+def Drop(channel, msg):
+    pass
+
+
+def incs(output):
+    # <in|Inc|out>
+    blocks = [[(Inc, (0, ), (1, )), (output, (1, ), ())]]
+
+    return Program(blocks, [{}], ['in', 'out'], {'in': 0})
+
+
+class TestProfile(unittest.TestCase):
+
+    def test_outputs(self):
+        # Outputs are timed as any other box.
+        for output in (Drop, akr.Memory()):
+            for backend, n_workers in (('sequential', 1), ('threads', 2),
+                                       ('asyncio', 1)):
+                runner = akr.Runner(incs(output), {'in': list(range(10))},
+                                    n_workers, backend=backend, profile=True)
+                runner.run()
+
+                report = runner.profile.report()
+
+                for name in ('Inc', output.name):
+                    self.assertEqual(report[name]['in'], 10)
+                    self.assertEqual(report[name]['calls'], 10)
+                    self.assertGreater(report[name]['time_ns'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
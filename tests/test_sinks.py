@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import csv
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+from queue import SimpleQueue
+import akr
+from akr.program import Program
+
+
+@akr.transductor
+def Inc(n):
+    return (n + 1, )
+
+
+def incs(sink):
+    # <in|Inc|out>
+    blocks = [[(Inc, (0, ), (1, )), (sink, (1, ), ())]]
+
+    return Program(blocks, [{}], ['in', 'out'], {'in': 0})
+
+
+def read_json(path):
+    with open(path) as f:
+        return [(r['channel'], r['content'], tuple(r['id']))
+                for r in map(json.loads, f)]
+
+
+def read_csv(path):
+    with open(path, newline='') as f:
+        return [(channel, int(content), tuple(map(int, id.split())))
+                for channel, content, id in csv.reader(f)]
+
+
+def read_pickle(path):
+    records = []
+
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                records.append(pickle.load(f))
+            except EOFError:
+                return records
+
+
+class TestFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_processes(self):
+        # Workers in processes of their own pass their buffers to the writer
+        # of the process running the net.
+        sinks = [(akr.JsonLines, read_json), (akr.Csv, read_csv),
+                 (akr.PickleStream, read_pickle)]
+
+        for sink, read in sinks:
+            path = os.path.join(self.dir, sink.__name__)
+            akr.Runner(incs(sink(path, count=7)), {'in': list(range(100))},
+                       2, backend='processes').run()
+
+            records = read(path)
+
+            self.assertEqual(sorted(c for channel, c, id in records),
+                             list(range(1, 101)))
+            self.assertEqual(len({id for channel, c, id in records}), 100)
+            self.assertEqual({channel for channel, c, id in records},
+                             {'out'})
+
+
+class TestPolicy(unittest.TestCase):
+
+    def sink(self, **policy):
+        # Buffers passed on are left in the queue.
+        sink = akr.Memory(**policy)
+        sink.queue = SimpleQueue()
+
+        return sink
+
+    def put(self, sink, n):
+        for i in range(n):
+            sink('out', (i, (0, i)))
+
+    @staticmethod
+    def drain(queue):
+        sizes = []
+
+        while not queue.empty():
+            sizes.append(len(queue.get()))
+
+        return sizes
+
+    def test_count(self):
+        sink = self.sink(count=3)
+        self.put(sink, 7)
+
+        self.assertEqual(self.drain(sink.queue), [3, 3])
+
+        sink.flush()
+        self.assertEqual(self.drain(sink.queue), [1])
+
+    def test_bytes(self):
+        # Records of Memory are tuples of 3, their size is 3.
+        sink = self.sink(bytes=6)
+        self.put(sink, 5)
+
+        self.assertEqual(self.drain(sink.queue), [2, 2])
+
+    def test_interval(self):
+        sink = self.sink(interval=0.02)
+        self.put(sink, 2)
+
+        sink.expire()
+        self.assertEqual(self.drain(sink.queue), [])
+
+        # Once the interval has passed, by the next record or a check of
+        # the worker.
+        time.sleep(0.03)
+        self.put(sink, 1)
+        self.assertEqual(self.drain(sink.queue), [3])
+
+        self.put(sink, 1)
+        time.sleep(0.03)
+        sink.expire()
+        self.assertEqual(self.drain(sink.queue), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,14 @@
 import sys
 sys.path[0:0] = ['..', '../..']
 
-
+import io
+import os
+import tempfile
 import unittest
+import akr
 from akr.stream import *
+from akr.program import Program
+from akr.runtime import read
 
 
 class TestParser(unittest.TestCase):
@@ -40,5 +45,65 @@ class TestParser(unittest.TestCase):
             with self.assertRaises(ValueError):
                 s = factory.read(inp)
 
+
+class TestMessages(unittest.TestCase):
+
+    def test_columns(self):
+        # Messages survive packing into columns and pickling.
+        import pickle
+
+        msgs = [Message(i, (7, i // 3, 9, i % 3), None if i % 4 else 1)
+                for i in range(10)]
+
+        for i, m in enumerate(msgs):
+            m.set_loc(None if i == 5 else i % 2, (0, i % 3))
+
+        batch = pickle.loads(pickle.dumps(Messages(m.dump() for m in msgs)))
+
+        self.assertEqual(len(batch), len(msgs))
+        self.assertEqual([m.dump() for m in batch], [m.dump() for m in msgs])
+
+
+@akr.transductor
+def Inc(n):
+    return (n + 1, )
+
+
+class TestInput(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def empty(self):
+        # Empty inputs of every kind: a path, a file object, a generator.
+        return [self.path, io.StringIO(''), (n for n in ())]
+
+    def test_empty(self):
+        # An empty channel yields nothing, the others are read as usual.
+        sink = akr.Memory()
+        program = Program([[(Inc, (0, ), (2, )), (sink, (2, ), ())],
+                           [(Inc, (1, ), (2, )), (sink, (2, ), ())]],
+                          [{}, {}], ['a', 'b', 'out'], {'a': 0, 'b': 1})
+
+        for source in self.empty() + [[]]:
+            msgs = read(program, {'a': source, 'b': [1, 2, 3]})
+            self.assertEqual([m.content for m in msgs], [1, 2, 3])
+
+    def test_run(self):
+        sink = akr.Memory()
+        program = Program([[(Inc, (0, ), (1, )), (sink, (1, ), ())]],
+                          [{}], ['in', 'out'], {'in': 0})
+
+        for source in self.empty():
+            akr.Runner(program, {'in': source}, 2,
+                       backend='processes').run()
+
+        self.assertEqual(sink.records, [])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import unittest
+from collections import Counter
+import akr
+from akr.program import Program
+
+
+@akr.inductor
+def Gen(n):
+    return (n, ), (n - 1 if n > 1 else None)
+
+
+@akr.transductor
+def Square(n):
+    return (n * n, )
+
+
+def squares():
+    # <in|Gen|a> .. <a|Square|out>
+    sink = akr.Memory()
+    blocks = [[(Gen, (0, ), (1, )), (Square, (1, ), (2, )),
+               (sink, (2, ), ())]]
+
+    return Program(blocks, [{}], ['in', 'a', 'out'], {'in': 0})
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_moves(self):
+        # Everything received has been sent: messages, partials and stolen
+        # tasks.
+        for backend in ('threads', 'processes'):
+            runner = akr.Runner(squares(), {'in': [200, 1, 3, 500] * 4}, 2,
+                                backend=backend, trace=True)
+            runner.run()
+
+            sent, received = Counter(), Counter()
+            moves = {'send': 'msg', 'receive': 'msg'}
+
+            for trace in runner.traces:
+                for e in trace.export():
+                    # Messages are sent by `send' and received by `receive'.
+                    name = moves.get(e['name'], e['name'])
+                    n = e.get('args', {}).get('tasks', 1)
+
+                    if e.get('cat') == 'send':
+                        sent[name] += n
+                    elif e.get('cat') == 'receive':
+                        received[name] += n
+
+            self.assertEqual(sent, received)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import sys
+sys.path[0:0] = ['..', '../..']
+
+import unittest
+from queue import Empty
+from akr.transport import *
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.ring = RingBuffer(64)
+
+    def tearDown(self):
+        self.ring.release()
+
+    def test_wrap(self):
+        # Frames of every length cross the end of the ring at every offset,
+        # frame headers included.
+        for size in range(1, 29):
+            for i in range(12):
+                payload = bytes([size, i]) * (size // 2) + b'x' * (size % 2)
+
+                self.assertTrue(self.ring.write(payload))
+                self.assertEqual(self.ring.read(), (False, payload))
+
+        self.assertIsNone(self.ring.read())
+
+    def test_full(self):
+        # A frame is refused unless all of it fits.
+        self.assertTrue(self.ring.write(b'a' * 28))
+        self.assertTrue(self.ring.write(b'b' * 20))
+        self.assertFalse(self.ring.write(b'c' * 5))
+        self.assertTrue(self.ring.write(b'c' * 4))
+        self.assertFalse(self.ring.write(b'd'))
+
+        self.assertEqual(self.ring.read(), (False, b'a' * 28))
+        self.assertTrue(self.ring.write(b'd' * 28))
+
+        for payload in (b'b' * 20, b'c' * 4, b'd' * 28):
+            self.assertEqual(self.ring.read(), (False, payload))
+
+        self.assertIsNone(self.ring.read())
+
+
+class TestRingEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = RingTransport(2, capacity=256)
+        self.src = self.transport.endpoint(0)
+        self.dst = self.transport.endpoint(1)
+
+    def tearDown(self):
+        self.transport.release()
+
+    def drain(self, n):
+        # Messages taken by the destination while the source writes what is
+        # pending, as two workers would.
+        received = []
+
+        for i in range(10000):
+            if len(received) == n:
+                break
+
+            self.src.flush()
+
+            try:
+                received.append(self.dst.get(False))
+            except Empty:
+                pass
+
+        return received
+
+    def test_fragments(self):
+        # Messages larger than a frame are split, they arrive whole and in
+        # order with smaller ones in between.
+        sent = [('msg', bytes(range(256)) * 4), ('msg', b'small'),
+                ('msg', list(range(300))), ('stop', )]
+
+        for data in sent:
+            self.src.put(1, data)
+
+        self.assertTrue(self.src.pending[1])
+        self.assertEqual(self.drain(len(sent)), sent)
+
+        self.assertTrue(self.src.flush())
+        self.assertFalse(self.dst.fragments[0])
+
+    def test_pending(self):
+        # A full ring keeps messages pending, the ones put after them wait
+        # behind them.
+        sent = [('msg', i, b'x' * 40) for i in range(20)]
+
+        for data in sent:
+            self.src.put(1, data)
+
+        self.assertFalse(self.src.flush())
+        self.assertEqual(self.drain(len(sent)), sent)
+        self.assertTrue(self.src.flush())
+
+        with self.assertRaises(Empty):
+            self.dst.get(False)
+
+
+if __name__ == '__main__':
+    unittest.main()